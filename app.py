@@ -3,30 +3,112 @@ Business Rating Application
 A Flask app to rate businesses by sector with user authentication and admin panel.
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, abort, render_template, request, jsonify, session, redirect, url_for, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from sqlalchemy import inspect, text
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import and_, case, delete, event, func, inspect, insert, or_, select, text, update
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.schema import AddConstraint, CreateIndex, CreateTable
+from markupsafe import Markup
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.middleware.proxy_fix import ProxyFix
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import wraps
+import base64
 import click
+import csv
+import hmac
+import io
+import itertools
+import json
+import math
 import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+try:
+    import fcntl
+except ImportError:  # Windows: schema upgrades are not locked between processes.
+    fcntl = None
 from translations import get_translation
+from metrics import MetricsRegistry
+from query_guard import QueryBudgetExceeded, inspect_statements, query_budget
+from profiling import ProfileRateLimiter, ProfileStore, StackSampler
+from replicas import ReplicaPool, RoutingSession, normalize_database_url
+from rating_stream import RatingEventHub, event_stream
+from rate_limit import MemoryBucketStore, RateLimiter, SQLiteBucketStore, parse_limit
+from jobs import JobRunner
+from cache import TTLCache
 
 # Initialize Flask app
 app = Flask(__name__, static_folder='static', template_folder='templates')
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
-database_url = os.environ.get('DATABASE_URL', 'sqlite:///business_ratings.db')
-if database_url.startswith('postgres://'):
-    database_url = database_url.replace('postgres://', 'postgresql://', 1)
+database_url = normalize_database_url(os.environ.get('DATABASE_URL', 'sqlite:///business_ratings.db'))
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+app.config['DATABASE_REPLICA_URLS'] = [
+    url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+]
+app.config['REPLICA_STICKY_SECONDS'] = float(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+app.config['SSE_IPC_DIR'] = os.environ.get(
+    'SSE_IPC_DIR', os.path.join(tempfile.gettempdir(), f'business-ratings-events-{os.getppid()}')
+)
+app.config['SSE_HEARTBEAT_SECONDS'] = float(os.environ.get('SSE_HEARTBEAT_SECONDS', '15'))
+app.config['SSE_MAX_STREAM_SECONDS'] = float(os.environ.get('SSE_MAX_STREAM_SECONDS', '300'))
+app.config['WSGI_THREADS'] = int(os.environ.get('WSGI_THREADS', '32'))
+# Under gunicorn/gthread every open stream holds a worker thread, so streams get
+# at most a quarter of them. The ASGI entry point serves streams on its event loop.
+app.config['SSE_MAX_SUBSCRIBERS'] = int(os.environ.get('SSE_MAX_SUBSCRIBERS', max(app.config['WSGI_THREADS'] // 4, 1)))
+app.config['SSE_MAX_ASYNC_SUBSCRIBERS'] = int(os.environ.get('SSE_MAX_ASYNC_SUBSCRIBERS', '1000'))
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+app.config['RATE_LIMIT_STORAGE'] = os.environ.get(
+    'RATE_LIMIT_STORAGE', os.path.join(app.instance_path, 'rate_limits.sqlite3')
+)
+app.config['RATE_LIMITS'] = {
+    'login_ip': os.environ.get('RATE_LIMIT_LOGIN_IP', '10/60'),
+    'login_user': os.environ.get('RATE_LIMIT_LOGIN_USER', '5/60'),
+    'register_ip': os.environ.get('RATE_LIMIT_REGISTER_IP', '5/300'),
+    'rate_ip': os.environ.get('RATE_LIMIT_RATE_IP', '60/60'),
+    'rate_user': os.environ.get('RATE_LIMIT_RATE_USER', '30/60'),
+}
+app.config['SQLITE_TUNING'] = os.environ.get('SQLITE_TUNING', '1') == '1'
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', '-65536')),  # negative: KiB, so 64 MiB
+}
+app.config['SQLITE_WRITE_RETRIES'] = int(os.environ.get('SQLITE_WRITE_RETRIES', '5'))
+app.config['FACETS_CACHE_SECONDS'] = float(os.environ.get('FACETS_CACHE_SECONDS', '60'))
+app.config['JOBS_WORKER'] = os.environ.get('JOBS_WORKER', 'thread')
+app.config['JOBS_POLL_SECONDS'] = float(os.environ.get('JOBS_POLL_SECONDS', '2'))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Each gunicorn thread can hold a connection, so the pool has one per thread;
+# the overflow covers job runner and heartbeat threads.
+app.config['DATABASE_POOL_SIZE'] = int(os.environ.get('DATABASE_POOL_SIZE', app.config['WSGI_THREADS']))
+app.config['DATABASE_POOL_OVERFLOW'] = int(os.environ.get('DATABASE_POOL_OVERFLOW', '10'))
+database_url_parts = make_url(database_url)
+if database_url_parts.get_backend_name() != 'sqlite' or database_url_parts.database not in (None, '', ':memory:'):
+    # In-memory SQLite gets Flask-SQLAlchemy's StaticPool, which takes no size.
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': app.config['DATABASE_POOL_SIZE'],
+        'max_overflow': app.config['DATABASE_POOL_OVERFLOW'],
+    }
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['REMEMBER_COOKIE_HTTPONLY'] = True
 app.config['REMEMBER_COOKIE_SAMESITE'] = 'Lax'
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', '200'))
+app.config['QUERY_GUARD_ENABLED'] = os.environ.get('QUERY_GUARD_ENABLED') == '1'
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', '5'))
+app.config['PROFILE_MIN_INTERVAL_SECONDS'] = float(os.environ.get('PROFILE_MIN_INTERVAL_SECONDS', '30'))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
 
 is_production = os.environ.get('RENDER') == 'true' or bool(os.environ.get('DATABASE_URL'))
 if is_production:
@@ -39,10 +121,24 @@ else:
     app.config['REMEMBER_COOKIE_SECURE'] = False
 
 # Initialize extensions
-db = SQLAlchemy(app)
+replica_pool = ReplicaPool(
+    app.config['DATABASE_REPLICA_URLS'], engine_options=app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession, 'replica_pool': replica_pool})
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 db_ready_checked = False
+metrics_registry = MetricsRegistry(os.environ.get('METRICS_MULTIPROC_DIR'))
+profile_limiter = ProfileRateLimiter(app.config['PROFILE_MIN_INTERVAL_SECONDS'])
+profile_store = ProfileStore(app.config['PROFILE_DIR'])
+rating_hub = RatingEventHub(app.config['SSE_IPC_DIR'], max_subscribers=app.config['SSE_MAX_SUBSCRIBERS'])
+if app.config['RATE_LIMIT_STORAGE'] == 'memory':
+    rate_limiter = RateLimiter(MemoryBucketStore())
+else:
+    rate_limiter = RateLimiter(SQLiteBucketStore(app.config['RATE_LIMIT_STORAGE']))
+facet_cache = TTLCache(ttl=app.config['FACETS_CACHE_SECONDS'])
+# Card keys include the business version, so entries never go stale; the TTL only frees memory.
+card_cache = TTLCache(ttl=3600, maxsize=int(os.environ.get('CARD_CACHE_SIZE', '5000')))
 
 
 def get_data_health_summary():
@@ -63,17 +159,263 @@ def get_data_health_summary():
     if current_counts['businesses'] < expected_minimums['businesses']:
         warnings.append('Business count is below expected baseline')
 
-    return {
+    summary = {
         'status': 'warning' if warnings else 'ok',
         'current_counts': current_counts,
         'expected_minimums': expected_minimums,
         'warnings': warnings,
     }
+    if replica_pool.enabled:
+        summary['replicas'] = replica_pool.status()
+    return summary
 
 # =====================
 # Context Processors & Utilities
 # =====================
 
+@event.listens_for(Engine, 'connect')
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """Enable foreign keys (and so ON DELETE CASCADE) and the tuning pragmas on every SQLite connection"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_sqlite_pragmas(dbapi_connection, sqlite3.DatabaseError)
+
+
+def apply_sqlite_pragmas(dbapi_connection, errors):
+    """Run the connection pragmas; ``errors`` is the driver's exception class (sqlite3 or aiosqlite)."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    if app.config['SQLITE_TUNING']:
+        for name, value in app.config['SQLITE_PRAGMAS'].items():
+            try:
+                cursor.execute(f'PRAGMA {name}={value}')
+            except errors as exc:
+                # For example WAL on a read-only replica file: keep the connection usable.
+                app.logger.warning('Could not set PRAGMA %s=%s: %s', name, value, exc)
+    cursor.close()
+
+
+def is_sqlite_busy(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return isinstance(getattr(error, 'orig', None), sqlite3.OperationalError) and (
+        'database is locked' in message or 'database is busy' in message
+    )
+
+
+def retry_on_busy(view):
+    """Re-run a write view after rolling back when SQLite reports the database is locked.
+
+    The error comes back when a lock wait outlasts the busy timeout, and at once
+    when a WAL transaction that already read tries to write after another worker
+    committed, so the whole view is retried with exponential backoff and jitter.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        retries = app.config['SQLITE_WRITE_RETRIES']
+        for attempt in range(retries + 1):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as exc:
+                db.session.rollback()
+                if attempt == retries or not is_sqlite_busy(exc):
+                    raise
+                delay = min(0.02 * 2 ** attempt, 1.0) * (0.5 + random.random())
+                app.logger.info('Database busy in %s, retrying in %.0f ms', request.endpoint, delay * 1000)
+                time.sleep(delay)
+    return wrapped
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_sql_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info['sql_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_sql_statement(conn, cursor, statement, parameters, context, executemany):
+    """Collect each statement and its duration for the current request"""
+    started = conn.info.pop('sql_started', None)
+    if started is None or not has_request_context() or 'sql_statements' not in g:
+        return
+    duration = time.perf_counter() - started
+    g.sql_statements.append((statement, duration))
+    if 'sql_timeline' in g:
+        g.sql_timeline.append({
+            'offset_ms': round((started - g.request_started) * 1000, 3),
+            'duration_ms': round(duration * 1000, 3),
+            'statement': statement,
+        })
+
+
+@app.before_request
+def start_request_metrics():
+    """Start timing the request and collecting its SQL statements"""
+    g.request_started = time.perf_counter()
+    g.sql_statements = []
+
+
+@app.before_request
+def start_profiling():
+    """Sample the request's stacks when an admin asks for it with ?_profile=1 or X-Profile: 1"""
+    if request.args.get('_profile') != '1' and request.headers.get('X-Profile') != '1':
+        return
+    if not (current_user.is_authenticated and current_user.is_admin):
+        return
+    if not profile_limiter.acquire():
+        g.profile_status = 'rate-limited'
+        return
+
+    g.sql_timeline = []
+    g.profiler = StackSampler(threading.get_ident()).start()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Record latency, status, size and SQL usage for the finished request"""
+    started = g.get('request_started')
+    if started is None:
+        return response
+
+    statements = g.get('sql_statements', [])
+    metrics_registry.observe_request(
+        endpoint=request.endpoint or 'unmatched',
+        method=request.method,
+        status=response.status_code,
+        duration=time.perf_counter() - started,
+        response_size=None if response.is_streamed else response.calculate_content_length(),
+        statement_count=len(statements),
+        statement_seconds=sum(duration for _, duration in statements),
+    )
+    return response
+
+
+@app.before_request
+def route_reads_to_replica():
+    """Let read-only requests use a replica unless this client wrote very recently"""
+    if not replica_pool.enabled or request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        return
+    if session.get('db_primary_until', 0) > time.time():
+        return
+    db.session().info['use_replica'] = True
+
+
+@app.after_request
+def stick_to_primary_after_write(response):
+    """Keep this client's next reads on the primary so it sees its own writes"""
+    if replica_pool.enabled and db.session().info.get('wrote'):
+        session['db_primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+
+def configure_read_replicas(urls):
+    """Point read-only traffic at the given replica URLs (an empty list disables routing)."""
+    replica_pool.configure(urls)
+
+
+@app.after_request
+def finish_profiling(response):
+    """Store the profile report and point the admin to it"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        if 'profile_status' in g:
+            response.headers['X-Profile-Status'] = g.profile_status
+        return response
+
+    try:
+        profiler.stop()
+        timeline = g.get('sql_timeline', [])
+        profile_id = profile_store.save({
+            'method': request.method,
+            'path': request.full_path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'started_at': datetime.utcnow().isoformat(),
+            'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 3),
+            'sql_ms': round(sum(entry['duration_ms'] for entry in timeline), 3),
+            'samples': sum(profiler.stacks.values()),
+            'interval_ms': profiler.interval * 1000,
+            'collapsed': profiler.collapsed(),
+            'sql': timeline,
+        })
+    finally:
+        profile_limiter.release()
+
+    response.headers['X-Profile-Status'] = 'recorded'
+    response.headers['X-Profile-Id'] = profile_id
+    response.headers['X-Profile-Report'] = url_for('admin_profile', profile_id=profile_id)
+    return response
+
+
+@app.teardown_request
+def abandon_profiling(error):
+    """Release the profiler if the request failed before its report was stored"""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        profile_limiter.release()
+
+
+@app.after_request
+def enforce_query_budget(response):
+    """Log slow queries; in debug and test runs also check budgets and N+1 patterns"""
+    statements = g.get('sql_statements')
+    if statements is None:
+        return response
+
+    guarded = app.debug or app.testing or app.config['QUERY_GUARD_ENABLED']
+    view = app.view_functions.get(request.endpoint)
+    violation = inspect_statements(
+        statements,
+        route=f'{request.method} {request.endpoint or request.path}',
+        logger=app.logger,
+        budget=getattr(view, 'query_budget', None) if guarded else None,
+        repeat_threshold=app.config['N_PLUS_ONE_THRESHOLD'],
+        slow_query_ms=app.config['SLOW_QUERY_MS'],
+        check_patterns=guarded,
+    )
+    if violation and app.testing:
+        raise QueryBudgetExceeded(violation)
+    return response
+
+
+@app.before_request
+def start_job_worker():
+    """Run queued background jobs in a thread of this process unless a separate worker does"""
+    if app.config['JOBS_WORKER'] == 'thread':
+        job_runner.start()
+
+
+def rate_limit(name, user_key=None):
+    """Apply the configured per-IP and per-user token buckets to POST requests"""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method == 'POST' and app.config['RATE_LIMIT_ENABLED']:
+                limits = app.config['RATE_LIMITS']
+                rules = [(f'{name}:ip:{request.remote_addr}', *parse_limit(limits[f'{name}_ip']))]
+                user = user_key() if user_key else None
+                if user and f'{name}_user' in limits:
+                    rules.append((f'{name}:user:{user}', *parse_limit(limits[f'{name}_user'])))
+
+                try:
+                    retry_after = rate_limiter.check(rules)
+                except sqlite3.Error as exc:
+                    # A contended or broken bucket file must not take the route down with it.
+                    app.logger.warning('Rate limit check for %s skipped: %s', name, exc)
+                    retry_after = 0
+                if retry_after:
+                    response = jsonify({'error': 'Too many requests'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                    return response
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def login_attempt_username():
+    data = request.get_json(silent=True) if request.is_json else request.form
+    return (data or {}).get('username')
+
+
 @app.context_processor
 def inject_user():
     """Inject current user and language into templates"""
@@ -91,8 +433,7 @@ def set_language():
 
     if is_production and not db_ready_checked:
         try:
-            ensure_database_ready()
-            db_ready_checked = True
+            db_ready_checked = ensure_database_ready()
         except SQLAlchemyError:
             db.session.rollback()
 
@@ -115,7 +456,7 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    ratings = db.relationship('Rating', backref='user', lazy=True, cascade='all, delete-orphan')
+    ratings = db.relationship('Rating', backref='user', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -131,7 +472,10 @@ class Sector(db.Model):
     description = db.Column(db.Text)
     location = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    businesses = db.relationship('Business', backref='sector', lazy=True, cascade='all, delete-orphan')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    businesses = db.relationship(
+        'Business', backref='sector', lazy=True, cascade='all, delete-orphan', passive_deletes=True
+    )
 
     def to_dict(self):
         return {
@@ -147,18 +491,34 @@ class Business(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text)
-    sector_id = db.Column(db.Integer, db.ForeignKey('sector.id'), nullable=False)
+    sector_id = db.Column(db.Integer, db.ForeignKey('sector.id', ondelete='CASCADE'), nullable=False)
     website = db.Column(db.String(255))
     location = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    ratings = db.relationship('Rating', backref='business', lazy=True, cascade='all, delete-orphan')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Child rows are removed by ON DELETE CASCADE instead of being loaded and deleted one by one.
+    ratings = db.relationship(
+        'Rating', backref='business', lazy=True, cascade='all, delete-orphan', passive_deletes=True
+    )
+    stats = db.relationship(
+        'BusinessRatingStats', uselist=False, lazy='joined', cascade='all, delete-orphan', passive_deletes=True
+    )
+    daily_rollups = db.relationship('RatingDailyRollup', lazy=True, cascade='all, delete-orphan', passive_deletes=True)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('stats', BusinessRatingStats())
+        super().__init__(**kwargs)
 
     def get_average_rating(self):
+        if self.stats is not None:
+            return self.stats.get_average()
         if not self.ratings:
             return 0
         return round(sum(r.score for r in self.ratings) / len(self.ratings), 2)
 
     def get_rating_count(self):
+        if self.stats is not None:
+            return self.stats.rating_count
         return len(self.ratings)
 
     def to_dict(self):
@@ -174,14 +534,30 @@ class Business(db.Model):
         }
 
 
+def location_key(column):
+    """SQL expression for the normalized location used by filters and facets"""
+    return func.lower(func.trim(column))
+
+
+def normalize_location(value):
+    return value.strip().lower()
+
+
+db.Index('ix_business_location_key', location_key(Business.location))
+# Keyset pagination of business cards by name.
+db.Index('ix_business_name_id', Business.name, Business.id)
+db.Index('ix_business_sector_name_id', Business.sector_id, Business.name, Business.id)
+
+
 class Rating(db.Model):
     """Business rating model"""
     id = db.Column(db.Integer, primary_key=True)
     score = db.Column(db.Integer, nullable=False)  # 1-5 stars
     comment = db.Column(db.Text)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    business_id = db.Column(db.Integer, db.ForeignKey('business.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def to_dict(self):
         return {
@@ -194,8 +570,354 @@ class Rating(db.Model):
         }
 
 
+class BusinessRatingStats(db.Model):
+    """Star histogram per business, maintained incrementally on rating writes"""
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id', ondelete='CASCADE'), primary_key=True)
+    count_1 = db.Column(db.Integer, nullable=False, default=0)
+    count_2 = db.Column(db.Integer, nullable=False, default=0)
+    count_3 = db.Column(db.Integer, nullable=False, default=0)
+    count_4 = db.Column(db.Integer, nullable=False, default=0)
+    count_5 = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, **kwargs):
+        for column in ('count_1', 'count_2', 'count_3', 'count_4', 'count_5', 'rating_count', 'score_sum'):
+            kwargs.setdefault(column, 0)
+        super().__init__(**kwargs)
+
+    def get_average(self):
+        if not self.rating_count:
+            return 0
+        return round(self.score_sum / self.rating_count, 2)
+
+    def get_distribution(self):
+        return {str(score): getattr(self, f'count_{score}') for score in range(1, 6)}
+
+
+class RatingDailyRollup(db.Model):
+    """Ratings received per business per day (by rating creation date)"""
+    business_id = db.Column(db.Integer, db.ForeignKey('business.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DeletedRecord(db.Model):
+    """Tombstone for a deleted sector, business or rating, read by delta sync clients"""
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class Job(db.Model):
+    """Long-running admin operation, executed outside the request by the job runner"""
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, succeeded, failed
+    params = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    message = db.Column(db.Text)
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'message': self.message,
+            'error': self.error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+job_runner = JobRunner(app, db, Job, poll_interval=app.config['JOBS_POLL_SECONDS'])
+
+
+TOMBSTONE_ENTITIES = {Sector: 'sector', Business: 'business', Rating: 'rating'}
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def record_tombstones(session, flush_context, instances):
+    """Write a tombstone for every synced row deleted through the ORM"""
+    for instance in list(session.deleted):
+        entity = TOMBSTONE_ENTITIES.get(type(instance))
+        if entity and instance.id is not None:
+            session.add(DeletedRecord(entity=entity, entity_id=instance.id))
+
+
+CATALOG_MODELS = (Sector, Business)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def track_catalog_writes(session, flush_context, instances):
+    """Note ORM writes to sectors or businesses so catalog caches are cleared on commit"""
+    if any(isinstance(instance, CATALOG_MODELS) for instance in itertools.chain(
+        session.new, session.dirty, session.deleted
+    )):
+        session.info['catalog_changed'] = True
+
+
+def mark_catalog_changed():
+    """Clear catalog caches when the current transaction commits (for writes that skip the ORM)."""
+    db.session().info['catalog_changed'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def clear_catalog_caches(session):
+    """Drop cached facet counts once per committed catalog write"""
+    if session.info.pop('catalog_changed', False):
+        facet_cache.clear()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_catalog_writes(session):
+    session.info.pop('catalog_changed', None)
+
+
+def record_deletions(entity, ids):
+    """Write tombstones for rows removed with set-based deletes, which skip ORM events."""
+    now = datetime.utcnow()
+    rows = [{'entity': entity, 'entity_id': entity_id, 'deleted_at': now} for entity_id in ids]
+    if rows:
+        db.session.execute(insert(DeletedRecord), rows)
+
+
+def record_rating_change(business_id, day, old_score=None, new_score=None):
+    """Apply one rating insert, update or delete to the histogram and daily rollup."""
+    count_delta = (new_score is not None) - (old_score is not None)
+    sum_delta = (new_score or 0) - (old_score or 0)
+    if not count_delta and not sum_delta:
+        return
+
+    stats_values = {
+        'rating_count': BusinessRatingStats.rating_count + count_delta,
+        'score_sum': BusinessRatingStats.score_sum + sum_delta,
+    }
+    if old_score is not None:
+        column = getattr(BusinessRatingStats, f'count_{old_score}')
+        stats_values[column.key] = column - 1
+    if new_score is not None:
+        column = getattr(BusinessRatingStats, f'count_{new_score}')
+        stats_values[column.key] = column + 1
+
+    updated = db.session.execute(
+        update(BusinessRatingStats)
+        .where(BusinessRatingStats.business_id == business_id)
+        .values(stats_values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
+        # The rebuild reads the already-flushed rating, so it covers the rollup too.
+        rebuild_rating_stats(business_ids=[business_id])
+        return
+
+    updated = db.session.execute(
+        update(RatingDailyRollup)
+        .where(RatingDailyRollup.business_id == business_id, RatingDailyRollup.day == day)
+        .values(
+            rating_count=RatingDailyRollup.rating_count + count_delta,
+            score_sum=RatingDailyRollup.score_sum + sum_delta,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated and count_delta > 0:
+        db.session.add(RatingDailyRollup(
+            business_id=business_id, day=day, rating_count=count_delta, score_sum=sum_delta
+        ))
+
+
+def rebuild_rating_stats(business_ids=None):
+    """Recompute histograms and daily rollups from the rating table with grouped SQL."""
+    stats_filter = []
+    rollup_filter = []
+    if business_ids is not None:
+        stats_filter.append(BusinessRatingStats.business_id.in_(business_ids))
+        rollup_filter.append(RatingDailyRollup.business_id.in_(business_ids))
+
+    db.session.execute(delete(BusinessRatingStats).where(*stats_filter).execution_options(synchronize_session=False))
+    db.session.execute(delete(RatingDailyRollup).where(*rollup_filter).execution_options(synchronize_session=False))
+
+    histogram = select(
+        Business.id,
+        *[func.coalesce(func.sum(case((Rating.score == score, 1), else_=0)), 0) for score in range(1, 6)],
+        func.count(Rating.id),
+        func.coalesce(func.sum(Rating.score), 0),
+    ).select_from(Business).outerjoin(Rating, Rating.business_id == Business.id).group_by(Business.id)
+    if business_ids is not None:
+        histogram = histogram.where(Business.id.in_(business_ids))
+    db.session.execute(insert(BusinessRatingStats).from_select(
+        ['business_id', 'count_1', 'count_2', 'count_3', 'count_4', 'count_5', 'rating_count', 'score_sum'],
+        histogram,
+    ))
+
+    rating_day = func.date(Rating.created_at)
+    daily = select(
+        Rating.business_id, rating_day, func.count(Rating.id), func.sum(Rating.score)
+    ).group_by(Rating.business_id, rating_day)
+    if business_ids is not None:
+        daily = daily.where(Rating.business_id.in_(business_ids))
+    db.session.execute(insert(RatingDailyRollup).from_select(
+        ['business_id', 'day', 'rating_count', 'score_sum'],
+        daily,
+    ))
+
+
+def outdated_foreign_keys(inspector, table):
+    """Return the model's foreign keys whose ON DELETE rule differs from the database's."""
+    existing = {
+        tuple(fk['constrained_columns']): fk for fk in inspector.get_foreign_keys(table.name)
+    }
+    outdated = []
+    for constraint in table.foreign_key_constraints:
+        current = existing.get(tuple(constraint.column_keys))
+        current_rule = ((current or {}).get('options') or {}).get('ondelete')
+        if (current_rule or '').upper() != (constraint.ondelete or '').upper():
+            outdated.append((constraint, current))
+    return outdated
+
+
+def rebuild_sqlite_table(table):
+    """Recreate a SQLite table from its model (SQLite cannot alter constraints), keeping its rows.
+
+    Follows the procedure from the SQLite ALTER TABLE docs: build a new table,
+    copy, drop the old one and rename, with foreign key enforcement off.
+    """
+    preparer = db.engine.dialect.identifier_preparer
+    name = preparer.format_table(table)
+    new_name = preparer.quote(f'_new_{table.name}')
+    old_columns = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    columns = ', '.join(preparer.quote(column.name) for column in table.columns if column.name in old_columns)
+    create_sql = str(CreateTable(table).compile(dialect=db.engine.dialect)).replace(
+        f'CREATE TABLE {name} ', f'CREATE TABLE {new_name} ', 1
+    )
+
+    db.session.remove()
+    with db.engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        connection.commit()
+        try:
+            connection.exec_driver_sql(create_sql)
+            connection.exec_driver_sql(f'INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {name}')
+            # Orphans left behind by deletes made before cascades existed.
+            for constraint in table.foreign_key_constraints:
+                if constraint.ondelete == 'CASCADE':
+                    local, remote = constraint.elements[0].parent.name, constraint.elements[0].column
+                    connection.exec_driver_sql(
+                        f'DELETE FROM {new_name} WHERE {preparer.quote(local)} NOT IN '
+                        f'(SELECT {preparer.quote(remote.name)} FROM {preparer.format_table(remote.table)})'
+                    )
+            connection.exec_driver_sql(f'DROP TABLE {name}')
+            connection.exec_driver_sql(f'ALTER TABLE {new_name} RENAME TO {name}')
+            for index in table.indexes:
+                index.create(connection)
+            connection.commit()
+        finally:
+            connection.exec_driver_sql('PRAGMA foreign_keys=ON')
+            connection.commit()
+
+
+def tables_missing_updated_at(inspector):
+    """Synced tables created before they had an updated_at column"""
+    return [
+        name for name in ('sector', 'business', 'rating')
+        if inspector.has_table(name) and 'updated_at' not in {col['name'] for col in inspector.get_columns(name)}
+    ]
+
+
+def add_updated_at_columns():
+    for table_name in tables_missing_updated_at(inspect(db.engine)):
+        db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN updated_at TIMESTAMP'))
+        db.session.execute(text(f'UPDATE {table_name} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)'))
+        db.session.execute(text(
+            f'CREATE INDEX IF NOT EXISTS ix_{table_name}_updated_at ON {table_name} (updated_at)'
+        ))
+        db.session.commit()
+
+
+def tables_with_outdated_foreign_keys(inspector):
+    return [
+        table for table in db.metadata.sorted_tables
+        if inspector.has_table(table.name) and outdated_foreign_keys(inspector, table)
+    ]
+
+
+def migrate_foreign_keys():
+    """Give foreign keys of existing tables the ON DELETE rules declared on the models."""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        outdated = outdated_foreign_keys(inspector, table)
+        if not outdated:
+            continue
+        if db.engine.dialect.name == 'sqlite':
+            rebuild_sqlite_table(table)
+            continue
+        preparer = db.engine.dialect.identifier_preparer
+        for constraint, current in outdated:
+            if current and current.get('name'):
+                db.session.execute(text(
+                    f'ALTER TABLE {preparer.format_table(table)} DROP CONSTRAINT {preparer.quote(current["name"])}'
+                ))
+            db.session.execute(AddConstraint(constraint))
+        db.session.commit()
+
+
+SCHEMA_LOCK_KEY = 0x62756973  # pg_advisory_lock key for schema upgrades
+
+
+@contextmanager
+def schema_upgrade_lock():
+    """Hold an exclusive lock so only one process upgrades the schema at a time"""
+    url = db.engine.url
+    if url.get_backend_name() == 'postgresql':
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': SCHEMA_LOCK_KEY})
+            connection.commit()
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': SCHEMA_LOCK_KEY})
+                connection.commit()
+    elif url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:') and fcntl:
+        with open(f'{url.database}.upgrade-lock', 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+    else:
+        yield
+
+
+def upgrade_schema():
+    """Bring tables created by older versions up to the models; safe to run from several processes at once."""
+    with schema_upgrade_lock():
+        # Another process may have finished the upgrade while this one waited for the lock.
+        add_updated_at_columns()
+        migrate_foreign_keys()
+        for index in Business.__table__.indexes:
+            db.session.execute(CreateIndex(index, if_not_exists=True))
+        db.session.commit()
+
+
 def ensure_database_ready():
-    """Create database tables and optionally bootstrap an admin user from env vars."""
+    """Create database tables and optionally bootstrap an admin user from env vars.
+
+    Returns False, without touching data, while the schema still needs `flask upgrade-db`.
+    """
     db.create_all()
 
     inspector = inspect(db.engine)
@@ -205,6 +927,20 @@ def ensure_database_ready():
             db.session.execute(text('ALTER TABLE sector ADD COLUMN location VARCHAR(255)'))
             db.session.commit()
 
+    # Adding columns and rebuilding tables are left to `flask upgrade-db`: doing
+    # them on import raced between workers.
+    missing = tables_missing_updated_at(inspector)
+    if missing:
+        app.logger.error('Tables %s lack updated_at; run "flask upgrade-db"', ', '.join(missing))
+        return False
+
+    outdated = tables_with_outdated_foreign_keys(inspect(db.engine))
+    if outdated:
+        app.logger.warning(
+            'Foreign keys of %s lack their ON DELETE rules; run "flask upgrade-db"',
+            ', '.join(table.name for table in outdated),
+        )
+
     admin_username = os.environ.get('ADMIN_BOOTSTRAP_USERNAME')
     admin_email = os.environ.get('ADMIN_BOOTSTRAP_EMAIL')
     admin_password = os.environ.get('ADMIN_BOOTSTRAP_PASSWORD')
@@ -238,8 +974,75 @@ def ensure_database_ready():
     if Sector.query.count() < minimum_sample_sectors or Business.query.count() < minimum_sample_businesses:
         seed_sample_data(reset_businesses=False)
 
+    if BusinessRatingStats.query.count() != Business.query.count():
+        rebuild_rating_stats()
+        db.session.commit()
+    return True
+
+
+def delete_businesses(business_ids):
+    """Delete businesses with one statement and return the ids that existed.
+
+    Ratings, histograms and daily rollups go with them through ON DELETE CASCADE,
+    and tombstones are written in a single insert.
+    """
+    ids = db.session.execute(select(Business.id).where(Business.id.in_(business_ids))).scalars().all()
+    if ids:
+        record_deletions('business', ids)
+        db.session.execute(delete(Business).where(Business.id.in_(ids)).execution_options(synchronize_session=False))
+        mark_catalog_changed()
+    return ids
+
+
+def delete_sector(sector_id):
+    """Delete a sector and, through ON DELETE CASCADE, its businesses and their ratings; False if missing."""
+    deleted = db.session.execute(
+        delete(Sector).where(Sector.id == sector_id).execution_options(synchronize_session=False)
+    ).rowcount
+    if deleted:
+        # Sync clients drop a deleted sector's businesses themselves.
+        record_deletions('sector', [sector_id])
+        mark_catalog_changed()
+    return bool(deleted)
+
+
+def delete_all_businesses(batch_size=500, progress=None):
+    """Delete every business with its ratings and aggregates, committing one batch at a time."""
+    total = db.session.execute(select(func.count(Business.id))).scalar()
+    deleted = 0
+    while True:
+        ids = db.session.execute(select(Business.id).order_by(Business.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        delete_businesses(ids)
+        db.session.commit()
+        deleted += len(ids)
+        if progress:
+            progress(deleted, total, f'Deleted {deleted} of {total} businesses')
+    return deleted
+
+
+def rebuild_all_rating_stats(batch_size=200, progress=None):
+    """Rebuild every business's histogram and rollups, committing one batch of businesses at a time."""
+    total = db.session.execute(select(func.count(Business.id))).scalar()
+    done = 0
+    last_id = 0
+    while True:
+        ids = db.session.execute(
+            select(Business.id).where(Business.id > last_id).order_by(Business.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        rebuild_rating_stats(business_ids=ids)
+        db.session.commit()
+        done += len(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(done, total, f'Rebuilt stats for {done} of {total} businesses')
+    return done
+
 
-def seed_sample_data(reset_businesses: bool = False):
+def seed_sample_data(reset_businesses: bool = False, progress=None):
     """Seed sectors and businesses. Optionally clear ratings/businesses first."""
     sectors_data = [
         {'name': 'Banks', 'description': 'Banks and Banking Services - Personal and Business Banking'},
@@ -266,9 +1069,7 @@ def seed_sample_data(reset_businesses: bool = False):
     sectors_by_name = {sector.name: sector for sector in Sector.query.all()}
 
     if reset_businesses:
-        Rating.query.delete()
-        Business.query.delete()
-        db.session.commit()
+        delete_all_businesses(progress=progress)
 
     businesses_data = [
         {'name': 'Coris Bank', 'description': 'Full-service banking solutions', 'sector': 'Banks', 'location': 'New York', 'website': 'https://example.com'},
@@ -316,13 +1117,214 @@ def seed_sample_data(reset_businesses: bool = False):
     }
 
 
+SCALE_LOCATIONS = [
+    'New York', 'Atlanta', 'Lomé', 'London', 'Chicago', 'Boston', 'Denver', 'Austin',
+    'Miami', 'San Francisco', 'Paris', 'Dakar', 'Abidjan', 'Lagos', 'Accra', 'Montréal',
+]
+SCALE_COMMENTS = [
+    'Great service!', 'Friendly staff', 'Would come back', 'Too slow',
+    'Average experience', 'Excellent value', 'Not recommended', 'Clean and professional',
+]
+
+
+def _bulk_insert(table, columns, rows, batch_size):
+    """Insert an iterable of row tuples in batches.
+
+    Uses COPY on PostgreSQL and batched Core inserts everywhere else.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        preparer = db.engine.dialect.identifier_preparer
+        copy_sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            preparer.format_table(table),
+            ', '.join(preparer.quote(column) for column in columns),
+        )
+        cursor = db.session.connection().connection.cursor()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = 0
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+            pending += 1
+            if pending >= batch_size:
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+        return
+
+    statement = insert(table)
+    batch = []
+    for row in rows:
+        batch.append(dict(zip(columns, row)))
+        if len(batch) >= batch_size:
+            db.session.execute(statement, batch)
+            batch = []
+    if batch:
+        db.session.execute(statement, batch)
+
+
+def _zipf_weights(count, exponent, rng):
+    """Return shuffled Zipf-like popularity weights."""
+    weights = [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return weights
+
+
+def _skewed_score(quality, rng):
+    """Draw a 1-5 score around a business quality in [0, 1], with some angry outliers."""
+    if rng.random() < 0.06:
+        return 1
+    score = round(1 + 4 * quality + rng.gauss(0, 0.9))
+    return min(5, max(1, score))
+
+
+def seed_scale_data(sectors=20, businesses=1000, users=1000, ratings=100000, seed=42,
+                    batch_size=10000, days=365, password='loadtest'):
+    """Generate a reproducible synthetic dataset for load testing.
+
+    Rows are written with bulk inserts, ratings follow a Zipf popularity curve across
+    businesses and a per-business skewed star distribution. Every generated user shares
+    the same password so benchmarks can log in.
+    """
+    if sectors < 1 or users < 1 or (ratings and businesses < 1):
+        raise ValueError('sectors and users must be at least 1, and ratings need businesses')
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    sector_prefix = f'Scale Sector {seed}-'
+    business_prefix = f'Scale Business {seed}-'
+    user_prefix = f'scale_{seed}_'
+
+    if Sector.query.filter(Sector.name.like(f'{sector_prefix}%')).first():
+        raise ValueError(f'A dataset for seed {seed} already exists')
+
+    _bulk_insert(
+        Sector.__table__,
+        ['name', 'description', 'location', 'created_at', 'updated_at'],
+        (
+            (f'{sector_prefix}{i}', f'Synthetic sector {i}', rng.choice(SCALE_LOCATIONS), now, now)
+            for i in range(sectors)
+        ),
+        batch_size,
+    )
+    sector_ids = db.session.execute(
+        select(Sector.id).where(Sector.name.like(f'{sector_prefix}%')).order_by(Sector.id)
+    ).scalars().all()
+
+    sector_weights = _zipf_weights(len(sector_ids), 0.8, rng)
+    _bulk_insert(
+        Business.__table__,
+        ['name', 'description', 'sector_id', 'website', 'location', 'created_at', 'updated_at'],
+        (
+            (
+                f'{business_prefix}{i}',
+                f'Synthetic business {i}',
+                rng.choices(sector_ids, weights=sector_weights)[0],
+                '',
+                rng.choice(SCALE_LOCATIONS),
+                now,
+                now,
+            )
+            for i in range(businesses)
+        ),
+        batch_size,
+    )
+    business_ids = db.session.execute(
+        select(Business.id).where(Business.name.like(f'{business_prefix}%')).order_by(Business.id)
+    ).scalars().all()
+
+    password_hash = generate_password_hash(password)
+    _bulk_insert(
+        User.__table__,
+        ['username', 'email', 'password_hash', 'is_admin', 'created_at'],
+        (
+            (f'{user_prefix}{i}', f'{user_prefix}{i}@example.com', password_hash, False, now)
+            for i in range(users)
+        ),
+        batch_size,
+    )
+    user_ids = db.session.execute(
+        select(User.id).where(User.username.like(f'{user_prefix}%')).order_by(User.id)
+    ).scalars().all()
+
+    # One rating per (user, business), so a business can never exceed the user count.
+    popularity = _zipf_weights(len(business_ids), 1.1, rng)
+    total_weight = sum(popularity) or 1
+    per_business = [min(len(user_ids), int(ratings * weight / total_weight)) for weight in popularity]
+    shortfall = ratings - sum(per_business)
+    for index in sorted(range(len(per_business)), key=lambda i: -popularity[i]):
+        if shortfall <= 0:
+            break
+        extra = min(shortfall, len(user_ids) - per_business[index])
+        per_business[index] += extra
+        shortfall -= extra
+
+    window_seconds = max(days, 1) * 86400
+
+    def rating_rows():
+        for business_id, count in zip(business_ids, per_business):
+            quality = rng.betavariate(5, 2)
+            for user_id in rng.sample(user_ids, count):
+                created_at = now - timedelta(seconds=rng.random() * window_seconds)
+                yield (
+                    _skewed_score(quality, rng),
+                    rng.choice(SCALE_COMMENTS) if rng.random() < 0.1 else None,
+                    user_id,
+                    business_id,
+                    created_at,
+                    created_at,
+                )
+
+    _bulk_insert(
+        Rating.__table__,
+        ['score', 'comment', 'user_id', 'business_id', 'created_at', 'updated_at'],
+        rating_rows(),
+        batch_size,
+    )
+    rebuild_rating_stats()
+    mark_catalog_changed()
+    db.session.commit()
+
+    return {
+        'sectors': len(sector_ids),
+        'businesses': len(business_ids),
+        'users': len(user_ids),
+        'ratings': sum(per_business),
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+@job_runner.task('seed_sample_data')
+def seed_sample_data_job(job, reset_businesses=False):
+    """Background version of the admin sample data load, reporting delete progress"""
+    summary = seed_sample_data(reset_businesses=reset_businesses, progress=job.progress)
+    job.progress(summary['businesses'], summary['businesses'], 'Sample data loaded')
+    return summary
+
+
+@job_runner.task('rebuild_rating_stats')
+def rebuild_rating_stats_job(job):
+    """Background version of ``flask backfill-rating-stats``, in committed batches of businesses"""
+    rebuild_all_rating_stats(progress=job.progress)
+    return {
+        'businesses': BusinessRatingStats.query.count(),
+        'daily_rollups': RatingDailyRollup.query.count(),
+    }
+
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
 
 with app.app_context():
-    ensure_database_ready()
+    # When it succeeds here, the first request does not need to repeat it.
+    db_ready_checked = ensure_database_ready()
 
 
 # =====================
@@ -330,6 +1332,9 @@ with app.app_context():
 # =====================
 
 @app.route('/register', methods=['GET', 'POST'])
+@query_budget(4)
+@rate_limit('register')
+@retry_on_busy
 def register():
     if request.method == 'POST':
         data = request.get_json() if request.is_json else request.form
@@ -351,6 +1356,8 @@ def register():
 
 
 @app.route('/login', methods=['GET', 'POST'])
+@query_budget(3)
+@rate_limit('login', user_key=login_attempt_username)
 def login():
     if request.method == 'POST':
         data = request.get_json() if request.is_json else request.form
@@ -379,24 +1386,123 @@ def logout():
 # Routes - Main Pages
 # =====================
 
+CARDS_PAGE_SIZE = 24
+
+
+def encode_card_cursor(business):
+    payload = json.dumps([business.name, business.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_card_cursor(cursor):
+    """Return (name, business id) of the last card shown; raises ValueError for malformed cursors."""
+    try:
+        name, business_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except TypeError as exc:
+        raise ValueError('Invalid cursor') from exc
+    # Ids outside 64 bits cannot be bound as SQL integers.
+    if not isinstance(name, str) or type(business_id) is not int or not -2**63 <= business_id < 2**63:
+        raise ValueError('Invalid cursor')
+    return name, business_id
+
+
+def requested_card_cursor():
+    cursor = request.args.get('after')
+    return decode_card_cursor(cursor) if cursor else None
+
+
+def business_card_page(sector_id=None, after=None):
+    """Return one page of businesses ordered by name, and the cursor of the next page (or None)."""
+    query = Business.query
+    if sector_id is None:
+        query = query.options(joinedload(Business.sector))
+    else:
+        query = query.filter(Business.sector_id == sector_id)
+    if after is not None:
+        name, business_id = after
+        query = query.filter(or_(Business.name > name, and_(Business.name == name, Business.id > business_id)))
+
+    businesses = query.order_by(Business.name, Business.id).limit(CARDS_PAGE_SIZE + 1).all()
+    next_cursor = None
+    if len(businesses) > CARDS_PAGE_SIZE:
+        businesses = businesses[:CARDS_PAGE_SIZE]
+        next_cursor = encode_card_cursor(businesses[-1])
+    return businesses, next_cursor
+
+
+@app.template_global()
+def business_card(business, show_sector=True):
+    """Render a business card, reusing its HTML until the business, its stats or its sector name change"""
+    stats = business.stats
+    key = (
+        business.id,
+        business.updated_at,
+        stats.rating_count if stats else None,
+        stats.score_sum if stats else None,
+        show_sector,
+        (business.sector.name if business.sector else None) if show_sector else None,
+        session.get('lang', 'en'),
+    )
+    return card_cache.get_or_set(key, lambda: Markup(render_template(
+        '_business_card.html', business=business, show_sector=show_sector
+    )))
+
+
 @app.route('/')
+@query_budget(6)
 def index():
+    try:
+        after = requested_card_cursor()
+    except ValueError:
+        after = None
     sectors = Sector.query.all()
-    businesses = Business.query.order_by(Business.name.asc()).all()
-    return render_template('index.html', sectors=sectors, businesses=businesses)
+    businesses, next_cursor = business_card_page(after=after)
+    return render_template('index.html', sectors=sectors, businesses=businesses, next_cursor=next_cursor)
 
 
 @app.route('/sector/<int:sector_id>')
+@query_budget(6)
 def sector_detail(sector_id):
+    try:
+        after = requested_card_cursor()
+    except ValueError:
+        after = None
     sector = Sector.query.get_or_404(sector_id)
-    businesses = Business.query.filter_by(sector_id=sector_id).all()
-    return render_template('sector_detail.html', sector=sector, businesses=businesses)
+    businesses, next_cursor = business_card_page(sector_id=sector_id, after=after)
+    return render_template('sector_detail.html', sector=sector, businesses=businesses, next_cursor=next_cursor)
+
+
+@app.route('/fragments/businesses')
+@query_budget(3)
+def business_cards_fragment():
+    """Next page of business cards as HTML for "load more"; X-Next-Cursor carries the following cursor"""
+    try:
+        after = requested_card_cursor()
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    sector_id = request.args.get('sector_id', type=int)
+    businesses, next_cursor = business_card_page(sector_id=sector_id, after=after)
+    response = app.response_class(
+        ''.join(business_card(business, show_sector=sector_id is None) for business in businesses),
+        mimetype='text/html',
+    )
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+RECENT_RATINGS_LIMIT = 50
+STATS_MAX_DAYS = 365
 
 
 @app.route('/business/<int:business_id>')
+@query_budget(6)
 def business_detail(business_id):
     business = Business.query.get_or_404(business_id)
-    ratings = Rating.query.filter_by(business_id=business_id).order_by(Rating.created_at.desc()).all()
+    ratings = Rating.query.options(joinedload(Rating.user)).filter_by(
+        business_id=business_id
+    ).order_by(Rating.created_at.desc()).limit(RECENT_RATINGS_LIMIT).all()
     return render_template('business_detail.html', business=business, ratings=ratings)
 
 
@@ -405,7 +1511,19 @@ def healthz():
     return jsonify({'status': 'ok'}), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    token = app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    token_ok = bool(token) and hmac.compare_digest(header, f'Bearer {token}')
+    if not token_ok and not (current_user.is_authenticated and current_user.is_admin):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return app.response_class(metrics_registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/admin/data-health', methods=['GET'])
+@query_budget(6)
 @login_required
 def admin_data_health():
     if not current_user.is_admin:
@@ -418,19 +1536,123 @@ def admin_data_health():
 # Routes - API (Ratings)
 # =====================
 
+def catalog_filters(args=None):
+    """Read repeated ``sector_id`` and ``location`` query parameters (from the current request by default)"""
+    args = request.args if args is None else args
+    sector_ids = sorted(set(args.getlist('sector_id', type=int)))
+    locations = sorted({normalize_location(value) for value in args.getlist('location') if value.strip()})
+    return sector_ids, locations
+
+
+def build_facets(sector_ids, locations):
+    """Business counts per sector and per location; each facet applies only the other facet's filter."""
+    sector_join = [Business.sector_id == Sector.id]
+    if locations:
+        sector_join.append(location_key(Business.location).in_(locations))
+    sector_rows = db.session.execute(
+        select(Sector.id, Sector.name, func.count(Business.id))
+        .outerjoin(Business, and_(*sector_join))
+        .group_by(Sector.id, Sector.name)
+        .order_by(Sector.name)
+    ).all()
+
+    key = location_key(Business.location)
+    location_query = select(key, func.min(func.trim(Business.location)), func.count(Business.id)).where(
+        Business.location.isnot(None), func.trim(Business.location) != ''
+    )
+    if sector_ids:
+        location_query = location_query.where(Business.sector_id.in_(sector_ids))
+    location_rows = db.session.execute(
+        location_query.group_by(key).order_by(func.count(Business.id).desc(), key)
+    ).all()
+
+    return {
+        'sectors': [{'id': id_, 'name': name, 'count': count} for id_, name, count in sector_rows],
+        'locations': [{'value': value, 'label': label, 'count': count} for value, label, count in location_rows],
+        'total': sum(count for id_, _, count in sector_rows if not sector_ids or id_ in sector_ids),
+    }
+
+
+# The read API payloads take the session to use, so asgi.py can build the same
+# responses from its async engine through AsyncSession.run_sync.
+
+def businesses_payload(session, sector_ids, locations):
+    query = select(Business).options(joinedload(Business.sector))
+    if sector_ids:
+        query = query.where(Business.sector_id.in_(sector_ids))
+    if locations:
+        query = query.where(location_key(Business.location).in_(locations))
+    return [b.to_dict() for b in session.scalars(query).unique()]
+
+
+def business_ratings_payload(session, business_id):
+    ratings = session.scalars(
+        select(Rating)
+        .options(joinedload(Rating.user), joinedload(Rating.business))
+        .where(Rating.business_id == business_id)
+    ).unique()
+    return [r.to_dict() for r in ratings]
+
+
+def business_stats_payload(session, business_id, days):
+    """Histogram and per-day counts for the last ``days`` days, or None if the business does not exist."""
+    business = session.get(Business, business_id)
+    if business is None:
+        return None
+    days = min(max(days, 1), STATS_MAX_DAYS)
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+
+    rollups = {
+        rollup.day: rollup
+        for rollup in session.scalars(select(RatingDailyRollup).where(
+            RatingDailyRollup.business_id == business_id,
+            RatingDailyRollup.day >= first_day,
+        ))
+    }
+    daily = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        rollup = rollups.get(day)
+        count = rollup.rating_count if rollup else 0
+        daily.append({
+            'date': day.isoformat(),
+            'count': count,
+            'average_rating': round(rollup.score_sum / count, 2) if count else None,
+        })
+
+    stats = business.stats or BusinessRatingStats()
+    return {
+        'business_id': business.id,
+        'average_rating': stats.get_average(),
+        'rating_count': stats.rating_count,
+        'distribution': stats.get_distribution(),
+        'daily': daily,
+    }
+
+
 @app.route('/api/businesses', methods=['GET'])
+@query_budget(4)
 def get_businesses():
-    sector_id = request.args.get('sector_id', type=int)
-    if sector_id:
-        businesses = Business.query.filter_by(sector_id=sector_id).all()
-    else:
-        businesses = Business.query.all()
+    sector_ids, locations = catalog_filters()
+    return jsonify(businesses_payload(db.session, sector_ids, locations))
 
-    return jsonify([b.to_dict() for b in businesses])
+
+@app.route('/api/facets', methods=['GET'])
+@query_budget(2)
+def get_facets():
+    sector_ids, locations = catalog_filters()
+    facets = facet_cache.get_or_set(
+        (tuple(sector_ids), tuple(locations)), lambda: build_facets(sector_ids, locations)
+    )
+    return jsonify(facets)
 
 
 @app.route('/api/rate', methods=['POST'])
+@query_budget(10)
 @login_required
+@rate_limit('rate', user_key=lambda: current_user.id)
+@retry_on_busy
 def rate_business():
     data = request.get_json(silent=True) or {}
     business_id = data.get('business_id')
@@ -456,25 +1678,186 @@ def rate_business():
     ).first()
 
     if existing_rating:
+        old_score = existing_rating.score
         existing_rating.score = score
         existing_rating.comment = comment
+        record_rating_change(business_id, existing_rating.created_at.date(), old_score=old_score, new_score=score)
     else:
         rating = Rating(
             score=score,
             comment=comment,
             user_id=current_user.id,
-            business_id=business_id
+            business_id=business_id,
+            created_at=datetime.utcnow()
         )
         db.session.add(rating)
+        record_rating_change(business_id, rating.created_at.date(), new_score=score)
 
     db.session.commit()
-    return jsonify({'message': 'Rating saved', 'average_rating': business.get_average_rating()}), 201
+    average_rating = business.get_average_rating()
+    rating_hub.publish({
+        'business_id': business_id,
+        'average': average_rating,
+        'count': business.get_rating_count(),
+    })
+    return jsonify({'message': 'Rating saved', 'average_rating': average_rating}), 201
+
+
+@app.route('/api/stream/ratings', methods=['GET'])
+def stream_ratings():
+    subscription = rating_hub.subscribe(
+        request.args.get('business_id', type=int), limit=app.config['SSE_MAX_SUBSCRIBERS']
+    )
+    if subscription is None:
+        return jsonify({'error': 'Too many live subscribers, retry later'}), 503
+
+    stream = event_stream(
+        rating_hub,
+        subscription,
+        heartbeat=app.config['SSE_HEARTBEAT_SECONDS'],
+        max_seconds=app.config['SSE_MAX_STREAM_SECONDS'],
+    )
+    response = app.response_class(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # HEAD responses close the generator before it starts, which skips its finally.
+    response.call_on_close(lambda: rating_hub.unsubscribe(subscription))
+    return response
 
 
 @app.route('/api/ratings/business/<int:business_id>', methods=['GET'])
+@query_budget(3)
 def get_business_ratings(business_id):
-    ratings = Rating.query.filter_by(business_id=business_id).all()
-    return jsonify([r.to_dict() for r in ratings])
+    return jsonify(business_ratings_payload(db.session, business_id))
+
+
+@app.route('/api/businesses/<int:business_id>/stats', methods=['GET'])
+@query_budget(3)
+def get_business_stats(business_id):
+    payload = business_stats_payload(db.session, business_id, request.args.get('days', 30, type=int))
+    if payload is None:
+        abort(404)
+    return jsonify(payload)
+
+
+# =====================
+# Routes - API v2 (Mobile Sync)
+# =====================
+
+SYNC_PAGE_SIZE = 1000
+SYNC_TOKEN_OVERLAP = timedelta(seconds=5)
+TOMBSTONE_RETENTION_DAYS = 90
+SYNC_EPOCH = datetime(1970, 1, 1)
+SECTOR_SYNC_COLUMNS = ['id', 'name', 'description', 'location']
+BUSINESS_SYNC_COLUMNS = ['id', 'name', 'description', 'sector_id', 'website', 'location', 'average_rating', 'rating_count']
+RATING_SYNC_COLUMNS = ['id', 'business_id', 'score', 'comment', 'username', 'created_at']
+
+
+def encode_sync_token(moment, rating_id=None):
+    micros = (moment - SYNC_EPOCH) // timedelta(microseconds=1)
+    return str(micros) if rating_id is None else f'{micros}.{rating_id}'
+
+
+def decode_sync_token(token):
+    """Return (timestamp, last rating id or None); raises ValueError for malformed tokens."""
+    micros, _, rating_id = (token or '').partition('.')
+    moment = SYNC_EPOCH + timedelta(microseconds=int(micros))
+    return moment, int(rating_id) if rating_id else None
+
+
+def sync_table(columns, rows):
+    return {'columns': columns, 'rows': rows}
+
+
+def sector_sync_row(sector):
+    return [sector.id, sector.name, sector.description, sector.location]
+
+
+def business_sync_row(business):
+    return [
+        business.id, business.name, business.description, business.sector_id, business.website,
+        business.location, business.get_average_rating(), business.get_rating_count(),
+    ]
+
+
+def rating_sync_row(rating):
+    return [
+        rating.id, rating.business_id, rating.score, rating.comment,
+        rating.user.username, rating.created_at.isoformat(),
+    ]
+
+
+@app.route('/api/v2/bootstrap', methods=['GET'])
+@query_budget(3)
+def api_v2_bootstrap():
+    # Taken before reading so rows changed mid-request are sent again by /changes.
+    token = encode_sync_token(datetime.utcnow() - SYNC_TOKEN_OVERLAP)
+    sectors = Sector.query.order_by(Sector.id).all()
+    businesses = Business.query.order_by(Business.id).all()
+    return jsonify({
+        'token': token,
+        'sectors': sync_table(SECTOR_SYNC_COLUMNS, [sector_sync_row(s) for s in sectors]),
+        'businesses': sync_table(BUSINESS_SYNC_COLUMNS, [business_sync_row(b) for b in businesses]),
+    })
+
+
+@app.route('/api/v2/changes', methods=['GET'])
+@query_budget(8)
+def api_v2_changes():
+    try:
+        since, after_rating_id = decode_sync_token(request.args.get('since'))
+    except (ValueError, OverflowError):
+        return jsonify({'error': 'Invalid sync token'}), 400
+
+    now = datetime.utcnow()
+    if since < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+        return jsonify({'error': 'Sync token expired', 'reset': True}), 410
+    next_token = encode_sync_token(now - SYNC_TOKEN_OVERLAP)
+
+    if after_rating_id is None:
+        rating_filter = Rating.updated_at >= since
+    else:
+        rating_filter = or_(
+            Rating.updated_at > since,
+            and_(Rating.updated_at == since, Rating.id > after_rating_id),
+        )
+    ratings = Rating.query.options(joinedload(Rating.user)).filter(rating_filter).order_by(
+        Rating.updated_at, Rating.id
+    ).limit(SYNC_PAGE_SIZE + 1).all()
+    has_more = len(ratings) > SYNC_PAGE_SIZE
+    ratings = ratings[:SYNC_PAGE_SIZE]
+    if has_more:
+        next_token = encode_sync_token(ratings[-1].updated_at, ratings[-1].id)
+
+    sectors = Sector.query.filter(Sector.updated_at >= since).order_by(Sector.id).all()
+    # Businesses whose ratings changed are resent for their new aggregates.
+    rated_business_ids = select(Rating.business_id).where(rating_filter)
+    businesses = Business.query.filter(
+        or_(Business.updated_at >= since, Business.id.in_(rated_business_ids))
+    ).order_by(Business.id).all()
+
+    deleted_ids = {'sector': set(), 'business': set(), 'rating': set()}
+    for tombstone in DeletedRecord.query.filter(DeletedRecord.deleted_at >= since):
+        deleted_ids[tombstone.entity].add(tombstone.entity_id)
+    # SQLite may reuse the id of a deleted row; a live row wins over its old tombstone.
+    for model, entity in TOMBSTONE_ENTITIES.items():
+        if deleted_ids[entity]:
+            alive = db.session.execute(select(model.id).where(model.id.in_(deleted_ids[entity]))).scalars()
+            deleted_ids[entity].difference_update(alive)
+
+    return jsonify({
+        'token': next_token,
+        'has_more': has_more,
+        'sectors': sync_table(SECTOR_SYNC_COLUMNS, [sector_sync_row(s) for s in sectors]),
+        'businesses': sync_table(BUSINESS_SYNC_COLUMNS, [business_sync_row(b) for b in businesses]),
+        'ratings': sync_table(RATING_SYNC_COLUMNS, [rating_sync_row(r) for r in ratings]),
+        'deleted': {
+            'sectors': sorted(deleted_ids['sector']),
+            'businesses': sorted(deleted_ids['business']),
+            'ratings': sorted(deleted_ids['rating']),
+        },
+    })
 
 
 # =====================
@@ -499,8 +1882,32 @@ def admin_dashboard():
                          users_count=users_count)
 
 
+@app.route('/admin/profiles', methods=['GET'])
+@login_required
+def admin_profiles():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    return jsonify(profile_store.list()), 200
+
+
+@app.route('/admin/profiles/<profile_id>', methods=['GET'])
+@login_required
+def admin_profile(profile_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    report = profile_store.load(profile_id)
+    if not report:
+        return jsonify({'error': 'Profile not found'}), 404
+    if request.args.get('format') == 'collapsed':
+        return app.response_class(report['collapsed'], mimetype='text/plain')
+    return jsonify(report), 200
+
+
 @app.route('/admin/sectors', methods=['GET', 'POST', 'DELETE'])
 @login_required
+@retry_on_busy
 def admin_sectors():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
@@ -522,6 +1929,7 @@ def admin_sectors():
 
 @app.route('/admin/sectors/<int:sector_id>', methods=['PUT'])
 @login_required
+@retry_on_busy
 def admin_update_sector(sector_id):
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
@@ -548,12 +1956,42 @@ def admin_update_sector(sector_id):
     return jsonify(sector.to_dict()), 200
 
 
-@app.route('/admin/businesses', methods=['GET', 'POST'])
+@app.route('/admin/sectors/<int:sector_id>', methods=['DELETE'])
+@login_required
+@retry_on_busy
+def admin_delete_sector(sector_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    if not delete_sector(sector_id):
+        return jsonify({'error': 'Sector not found'}), 404
+    db.session.commit()
+    return jsonify({'message': 'Sector deleted'}), 200
+
+
+@app.route('/admin/businesses', methods=['GET', 'POST', 'DELETE'])
 @login_required
+@retry_on_busy
 def admin_businesses():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
 
+    if request.method == 'DELETE':
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        valid = isinstance(ids, list) and ids and all(type(business_id) is int for business_id in ids)
+        if not valid:
+            return jsonify({'error': 'ids must be a non-empty list of business ids'}), 400
+        if len(ids) > 1000:
+            return jsonify({'error': 'At most 1000 ids per request'}), 400
+
+        deleted = delete_businesses(ids)
+        db.session.commit()
+        return jsonify({
+            'deleted': sorted(deleted),
+            'not_found': sorted(set(ids) - set(deleted)),
+        }), 200
+
     if request.method == 'POST':
         data = request.get_json()
         business = Business(
@@ -567,24 +2005,26 @@ def admin_businesses():
         db.session.commit()
         return jsonify(business.to_dict()), 201
 
-    businesses = Business.query.all()
+    businesses = Business.query.options(joinedload(Business.sector)).all()
     return jsonify([b.to_dict() for b in businesses])
 
 
 @app.route('/admin/business/<int:business_id>', methods=['DELETE'])
 @login_required
+@retry_on_busy
 def admin_delete_business(business_id):
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
 
-    business = Business.query.get_or_404(business_id)
-    db.session.delete(business)
+    if not delete_businesses([business_id]):
+        return jsonify({'error': 'Not found'}), 404
     db.session.commit()
     return jsonify({'message': 'Business deleted'}), 200
 
 
 @app.route('/admin/business/<int:business_id>', methods=['PUT'])
 @login_required
+@retry_on_busy
 def admin_update_business(business_id):
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
@@ -626,6 +2066,7 @@ def admin_update_business(business_id):
 
 @app.route('/admin/seed', methods=['POST'])
 @login_required
+@retry_on_busy
 def admin_seed_data():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
@@ -633,14 +2074,54 @@ def admin_seed_data():
     data = request.get_json(silent=True) or {}
     force_reset = bool(data.get('force_reset', False))
 
-    summary = seed_sample_data(reset_businesses=force_reset)
+    if force_reset:
+        # Deleting every business and rating can take minutes on a large database.
+        job = job_runner.enqueue('seed_sample_data', {'reset_businesses': True}, created_by=current_user.id)
+        return jsonify({
+            'message': 'Sample data reset queued',
+            'mode': 'reset',
+            'job': job.to_dict(),
+        }), 202, {'Location': url_for('admin_job', job_id=job.id)}
+
+    summary = seed_sample_data(reset_businesses=False)
     return jsonify({
         'message': 'Sample sectors and companies loaded successfully',
-        'mode': 'reset' if force_reset else 'preserve',
+        'mode': 'preserve',
         'summary': summary
     }), 200
 
 
+@app.route('/admin/jobs', methods=['GET', 'POST'])
+@login_required
+def admin_jobs():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        kind = data.get('kind')
+        params = data.get('params') or {}
+        if kind not in job_runner.handlers or not isinstance(params, dict):
+            return jsonify({'error': 'Unknown job kind'}), 400
+        job = job_runner.enqueue(kind, params, created_by=current_user.id)
+        return jsonify(job.to_dict()), 202, {'Location': url_for('admin_job', job_id=job.id)}
+
+    jobs = Job.query.order_by(Job.created_at.desc()).limit(20).all()
+    return jsonify([job.to_dict() for job in jobs]), 200
+
+
+@app.route('/admin/jobs/<job_id>', methods=['GET'])
+@login_required
+def admin_job(job_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    job = db.session.get(Job, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+
 # =====================
 # Error Handlers
 # =====================
@@ -677,6 +2158,77 @@ def seed_db():
     )
 
 
+@app.cli.command()
+@click.option('--sectors', default=20, show_default=True, help='Number of sectors to create')
+@click.option('--businesses', default=1000, show_default=True, help='Number of businesses to create')
+@click.option('--users', default=1000, show_default=True, help='Number of users to create')
+@click.option('--ratings', default=100000, show_default=True, help='Number of ratings to create')
+@click.option('--seed', default=42, show_default=True, help='Random seed; also tags generated names')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows per bulk insert')
+@click.option('--days', default=365, show_default=True, help='Spread rating dates over this many days')
+@click.option('--password', default='loadtest', show_default=True, help='Password shared by generated users')
+def seed_scale(sectors, businesses, users, ratings, seed, batch_size, days, password):
+    """Generate a large synthetic dataset for load testing."""
+    try:
+        summary = seed_scale_data(
+            sectors=sectors,
+            businesses=businesses,
+            users=users,
+            ratings=ratings,
+            seed=seed,
+            batch_size=batch_size,
+            days=days,
+            password=password,
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+
+    print(
+        f"Generated scale dataset in {summary['seconds']}s. "
+        f"Sectors: {summary['sectors']}, Businesses: {summary['businesses']}, "
+        f"Users: {summary['users']}, Ratings: {summary['ratings']}"
+    )
+
+
+@app.cli.command()
+def upgrade_db():
+    """Upgrade tables created by older versions (run once per deploy, before the web workers start)."""
+    upgrade_schema()
+    ensure_database_ready()
+    print('Database schema is up to date.')
+
+
+@app.cli.command()
+def backfill_rating_stats():
+    """Rebuild rating histograms and daily rollups from the rating table."""
+    rebuild_rating_stats()
+    db.session.commit()
+    print(
+        f'Rebuilt rating stats for {BusinessRatingStats.query.count()} businesses '
+        f'({RatingDailyRollup.query.count()} daily rollups).'
+    )
+
+
+@app.cli.command()
+def purge_tombstones():
+    """Delete sync tombstones older than the retention window."""
+    cutoff = datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS)
+    deleted = DeletedRecord.query.filter(DeletedRecord.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    print(f'Purged {deleted} tombstones older than {TOMBSTONE_RETENTION_DAYS} days.')
+
+
+@app.cli.command()
+@click.option('--once', is_flag=True, help='Run the jobs that are queued now, then exit.')
+def run_jobs(once):
+    """Run background jobs in this process (pair with JOBS_WORKER=off on web workers)."""
+    if once:
+        print(f'Ran {job_runner.run_pending()} jobs.')
+        return
+    print('Waiting for jobs. Press Ctrl+C to stop.')
+    job_runner.run_forever()
+
+
 @app.cli.command()
 @click.argument('username')
 def make_admin(username):
@@ -695,4 +2247,6 @@ def make_admin(username):
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+        ensure_database_ready()
     app.run(debug=True)
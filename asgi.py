@@ -0,0 +1,243 @@
+"""
+Async serving mode for the Business Rating App.
+The read-only JSON API is answered from an async engine and connection pool, so
+a slow client holds a coroutine instead of a worker while its request or
+response trickles through. Live rating streams are served on the event loop
+too. Every other request goes to the Flask app, which runs in a thread pool
+next to it. Needs the packages in requirements-async.txt:
+
+    uvicorn asgi:application --workers 4
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qsl
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+
+from app import (
+    app, apply_sqlite_pragmas, business_ratings_payload, business_stats_payload, businesses_payload,
+    catalog_filters, db, metrics_registry, rating_hub,
+)
+from rating_stream import async_event_stream
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_database_url(url):
+    """Swap the driver of a sync database URL for its asyncio counterpart."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend} databases')
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'postgresql' and 'sslmode' in url.query:
+        # asyncpg spells libpq's sslmode as ssl.
+        url = url.update_query_dict({'ssl': url.query['sslmode']}).difference_update_query(['sslmode'])
+    return url
+
+
+def create_read_engine(url=None):
+    """Async engine for the read API: ASYNC_DATABASE_URL, else the app's primary database."""
+    if url is None:
+        url = os.environ.get('ASYNC_DATABASE_URL')
+    if url is None:
+        with app.app_context():
+            url = db.engine.url
+    url = async_database_url(url)
+    options = {'pool_pre_ping': True}
+    if url.get_backend_name() != 'sqlite':
+        options['pool_size'] = int(os.environ.get('ASYNC_POOL_SIZE', '10'))
+        options['max_overflow'] = int(os.environ.get('ASYNC_POOL_OVERFLOW', '10'))
+    engine = create_async_engine(url, **options)
+
+    if url.get_backend_name() == 'sqlite':
+        @event.listens_for(engine.sync_engine, 'connect')
+        def configure_connection(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, engine.dialect.dbapi.Error)
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info['async_sql_started'] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('async_sql_started', None)
+        statements = conn.info.get('async_statements')
+        if started is not None and statements is not None:
+            statements.append(time.perf_counter() - started)
+
+    return engine
+
+
+def collect(session, build, *args):
+    """Build a payload inside run_sync, returning it with the duration of each SQL statement."""
+    connection = session.connection()
+    connection.info['async_statements'] = statements = []
+    try:
+        return build(session, *args), statements
+    finally:
+        connection.info.pop('async_statements', None)
+
+
+def list_businesses(session, args):
+    sector_ids, locations = catalog_filters(args)
+    return businesses_payload(session, sector_ids, locations)
+
+
+def list_business_ratings(session, args, business_id):
+    return business_ratings_payload(session, int(business_id))
+
+
+def show_business_stats(session, args, business_id):
+    return business_stats_payload(session, int(business_id), args.get('days', 30, type=int))
+
+
+# Paths served here, with the Flask endpoint they mirror (used as the metrics label).
+ROUTES = [
+    (re.compile(r'/api/businesses'), 'get_businesses', list_businesses),
+    (re.compile(r'/api/ratings/business/(\d+)'), 'get_business_ratings', list_business_ratings),
+    (re.compile(r'/api/businesses/(\d+)/stats'), 'get_business_stats', show_business_stats),
+]
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+class AsyncReadAPI:
+    """ASGI app serving ROUTES for GET/HEAD from ``engine`` and everything else from ``wsgi_app`` in threads."""
+
+    def __init__(self, wsgi_app, engine, threads=32):
+        self.fallback = WSGIMiddleware(wsgi_app, workers=threads)
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+            if scope['path'] == '/api/stream/ratings':
+                await self.stream(scope, receive, send)
+                return
+            for pattern, endpoint, build in ROUTES:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    await self.serve(scope, send, endpoint, build, match.groups())
+                    return
+        await self.fallback(scope, receive, send)
+
+    async def serve(self, scope, send, endpoint, build, path_args):
+        started = time.perf_counter()
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        async with self.sessions() as session:
+            payload, statements = await session.run_sync(collect, build, args, *path_args)
+
+        if payload is None:
+            status, payload = 404, {'error': 'Not found'}
+        else:
+            status = 200
+        # Same bytes as Flask's jsonify outside debug mode.
+        body = (json.dumps(payload, sort_keys=True, separators=(',', ':')) + '\n').encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+        metrics_registry.observe_request(
+            endpoint=endpoint,
+            method=scope['method'],
+            status=status,
+            duration=time.perf_counter() - started,
+            response_size=len(body),
+            statement_count=len(statements),
+            statement_seconds=sum(statements),
+        )
+
+    async def stream(self, scope, receive, send):
+        """Serve /api/stream/ratings like the Flask view, holding a coroutine instead of a thread."""
+        started = time.perf_counter()
+        args = MultiDict(parse_qsl(scope['query_string'].decode('latin-1'), keep_blank_values=True))
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        subscription = rating_hub.subscribe(
+            args.get('business_id', type=int),
+            waker=lambda: loop.call_soon_threadsafe(ready.set),
+            # No Flask thread is held here, so the cap is the larger async one.
+            limit=app.config['SSE_MAX_ASYNC_SUBSCRIBERS'],
+        )
+        status = 503 if subscription is None else 200
+        metrics_registry.observe_request(
+            endpoint='stream_ratings',
+            method=scope['method'],
+            status=status,
+            duration=time.perf_counter() - started,
+            response_size=None,
+            statement_count=0,
+            statement_seconds=0.0,
+        )
+        if subscription is None:
+            body = b'{"error":"Too many live subscribers, retry later"}\n'
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        frames = async_event_stream(
+            rating_hub,
+            subscription,
+            ready,
+            heartbeat=app.config['SSE_HEARTBEAT_SECONDS'],
+            max_seconds=app.config['SSE_MAX_STREAM_SECONDS'],
+        )
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        # Wake the stream so a client that left is noticed before the next heartbeat.
+        disconnected.add_done_callback(lambda _: ready.set())
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [
+                    (b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            if scope['method'] == 'GET':
+                async for frame in frames:
+                    if disconnected.done():
+                        return
+                    await send({'type': 'http.response.body', 'body': frame.encode(), 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            await frames.aclose()
+            # A generator that never started (HEAD, or a failed send) skips its own finally.
+            rating_hub.unsubscribe(subscription)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = AsyncReadAPI(app, create_read_engine(), threads=app.config['WSGI_THREADS'])
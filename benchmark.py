@@ -0,0 +1,429 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+DATASET_SIZES = {
+    'small': {'sectors': 10, 'businesses': 100, 'users': 200, 'ratings': 2000},
+    'medium': {'sectors': 20, 'businesses': 1000, 'users': 2000, 'ratings': 50000},
+    'large': {'sectors': 50, 'businesses': 2000, 'users': 20000, 'ratings': 200000},
+}
+BENCH_SEED = 2024
+BENCH_PASSWORD = 'loadtest'
+ADMIN_USERNAME = 'bench_admin'
+SERVER_COMMANDS = {
+    'sync': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+    ],
+    'gthread': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'app:app', '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+        '--worker-class', 'gthread', '--threads', '32',
+    ],
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'asgi:application', '--workers', str(workers), '--port', str(port),
+        '--log-level', 'warning', '--no-access-log',
+    ],
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies, query_counts, peak, statuses):
+    return {
+        'samples': len(latencies),
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p90_ms': round(percentile(latencies, 90), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(max(latencies), 3),
+        'queries': int(statistics.median(query_counts)),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'status_codes': statuses,
+    }
+
+
+def measure_rate_limit_overhead(samples=2000):
+    """Time the per-request cost of the login/rate limiter checks (two buckets)."""
+    from app import rate_limiter
+    from rate_limit import parse_limit
+
+    rules = [
+        ('bench:ip:127.0.0.1', *parse_limit('1000000/1')),
+        ('bench:user:1', *parse_limit('1000000/1')),
+    ]
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        rate_limiter.check(rules)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    rate_limiter.check(rules)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(latencies, [0], peak, {})
+
+
+def build_scenarios():
+    """Return (name, login_as, method, path, payload) tuples for the hot routes."""
+    from sqlalchemy import func
+    from app import app, db, Business, Rating, User
+
+    with app.app_context():
+        popular = db.session.query(Rating.business_id, func.count(Rating.id).label('total')) \
+            .group_by(Rating.business_id).order_by(func.count(Rating.id).desc()).first()
+        business_id = popular[0] if popular else Business.query.first().id
+        sector_id = db.session.get(Business, business_id).sector_id
+        username = User.query.filter(User.username.like(f'scale_{BENCH_SEED}_%')).first().username
+
+    return [
+        ('index', None, 'GET', '/', None),
+        ('sector_detail', None, 'GET', f'/sector/{sector_id}', None),
+        ('business_detail', None, 'GET', f'/business/{business_id}', None),
+        ('api_businesses', None, 'GET', '/api/businesses', None),
+        ('api_businesses_filtered', None, 'GET', f'/api/businesses?sector_id={sector_id}&location=paris', None),
+        ('api_facets', None, 'GET', f'/api/facets?sector_id={sector_id}', None),
+        ('api_rate', username, 'POST', '/api/rate', {'business_id': business_id, 'score': 4, 'comment': 'bench'}),
+        ('login', None, 'POST', '/login', {'username': username, 'password': BENCH_PASSWORD}),
+        ('admin_data_health', ADMIN_USERNAME, 'GET', '/admin/data-health', None),
+    ]
+
+
+def run_worker(size, iterations, max_seconds):
+    """Seed the database configured via DATABASE_URL and benchmark every scenario."""
+    from sqlalchemy import event
+    from app import app, db, seed_scale_data, User
+
+    # Route timings exclude throttling; the limiter is measured on its own below.
+    app.config['RATE_LIMIT_ENABLED'] = False
+    with app.app_context():
+        seed_scale_data(seed=BENCH_SEED, password=BENCH_PASSWORD, **DATASET_SIZES[size])
+        admin = User(username=ADMIN_USERNAME, email='bench_admin@example.com', is_admin=True)
+        admin.set_password(BENCH_PASSWORD)
+        db.session.add(admin)
+        db.session.commit()
+        engine = db.engine
+
+    statement_counter = {'count': 0}
+
+    def count_statement(*args):
+        statement_counter['count'] += 1
+
+    event.listen(engine, 'before_cursor_execute', count_statement)
+
+    results = {}
+    for name, login_as, method, path, payload in build_scenarios():
+        client = app.test_client()
+        if login_as:
+            client.post('/login', json={'username': login_as, 'password': BENCH_PASSWORD})
+
+        def call():
+            if method == 'GET':
+                return client.get(path)
+            return client.post(path, json=payload)
+
+        for _ in range(2):
+            call()
+
+        latencies = []
+        query_counts = []
+        statuses = {}
+        deadline = time.perf_counter() + max_seconds
+        while len(latencies) < iterations and (len(latencies) < 3 or time.perf_counter() < deadline):
+            statement_counter['count'] = 0
+            started = time.perf_counter()
+            response = call()
+            latencies.append((time.perf_counter() - started) * 1000)
+            query_counts.append(statement_counter['count'])
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        tracemalloc.start()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = summarize(latencies, query_counts, peak, statuses)
+
+    results['rate_limit_check'] = measure_rate_limit_overhead()
+    return results
+
+
+def run_size(size, iterations, max_seconds):
+    """Benchmark one dataset size in a fresh interpreter against a throwaway SQLite file."""
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        env['RATE_LIMIT_STORAGE'] = os.path.join(workdir, 'rate_limits.sqlite3')
+        command = [
+            sys.executable, os.path.abspath(__file__), '--worker', size,
+            '--iterations', str(iterations), '--max-seconds', str(max_seconds),
+        ]
+        completed = subprocess.run(
+            command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f'Benchmark worker for {size} failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+async def http_get(port, path, send_seconds=0.0, timeout=60.0):
+    """GET ``path`` over a fresh connection, spreading the request bytes over ``send_seconds``."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        request = f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode()
+        chunks = 10 if send_seconds else 1
+        size = -(-len(request) // chunks)
+        for start in range(0, len(request), size):
+            writer.write(request[start:start + size])
+            await writer.drain()
+            if send_seconds:
+                await asyncio.sleep(send_seconds / chunks)
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def load_server(port, paths, slow_clients, slow_seconds, requests, concurrency):
+    """Fire ``requests`` normal GETs while ``slow_clients`` keep trickling theirs in."""
+    stop = asyncio.Event()
+    slow_done = {'count': 0}
+
+    async def slow_client(index):
+        while not stop.is_set():
+            try:
+                await http_get(port, paths[index % len(paths)], send_seconds=slow_seconds)
+                slow_done['count'] += 1
+            except (OSError, asyncio.TimeoutError):
+                await asyncio.sleep(0.1)
+
+    latencies = []
+    statuses = {}
+    pending = iter(range(requests))
+
+    async def fast_client():
+        for index in pending:
+            started = time.perf_counter()
+            try:
+                status = str(await http_get(port, paths[index % len(paths)]))
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = 'error'
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    slow_tasks = [asyncio.create_task(slow_client(i)) for i in range(slow_clients)]
+    await asyncio.sleep(min(slow_seconds, 1.0))
+    started = time.perf_counter()
+    await asyncio.gather(*(fast_client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*slow_tasks, return_exceptions=True)
+
+    return {
+        'samples': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(max(latencies), 3),
+        'slow_requests_completed': slow_done['count'],
+        'status_codes': statuses,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, path, process, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with code {process.returncode}')
+        try:
+            if asyncio.run(http_get(port, path, timeout=5.0)) == 200:
+                return
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not become ready')
+
+
+def run_servers(size, servers, options):
+    """Serve one seeded SQLite file with each server mode and load it with slow and normal clients."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        database = os.path.join(workdir, 'bench.db')
+        env = dict(os.environ)
+        env.update({
+            'DATABASE_URL': f'sqlite:///{database}',
+            'RATE_LIMIT_STORAGE': os.path.join(workdir, 'rate_limits.sqlite3'),
+            'RATE_LIMIT_ENABLED': '0',
+            'JOBS_WORKER': 'off',
+            'SSE_IPC_DIR': os.path.join(workdir, 'events'),
+        })
+        dataset = DATASET_SIZES[size]
+        seed_command = [sys.executable, '-m', 'flask', '--app', 'app', 'seed-scale', '--seed', str(BENCH_SEED)]
+        for option in ('sectors', 'businesses', 'users', 'ratings'):
+            seed_command += [f'--{option}', str(dataset[option])]
+        subprocess.run(seed_command, env=env, cwd=root, check=True, capture_output=True)
+
+        with sqlite3.connect(database) as connection:
+            business_id, sector_id = connection.execute('SELECT id, sector_id FROM business LIMIT 1').fetchone()
+        paths = [
+            f'/api/businesses?sector_id={sector_id}',
+            f'/api/ratings/business/{business_id}',
+            f'/api/businesses/{business_id}/stats',
+        ]
+
+        results = {}
+        for server in servers:
+            port = free_port()
+            process = subprocess.Popen(
+                SERVER_COMMANDS[server](port, options.workers), env=env, cwd=root,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_until_ready(port, paths[0], process)
+                results[server] = asyncio.run(load_server(
+                    port, paths, options.slow_clients, options.slow_seconds, options.requests, options.concurrency,
+                ))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+        return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(baseline, current, threshold, min_delta_ms):
+    """Return human-readable regressions between two benchmark reports."""
+    regressions = []
+    for size, scenarios in current['results'].items():
+        for name, metrics in scenarios.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if not previous:
+                continue
+            for key in ('p50_ms', 'p99_ms'):
+                delta = metrics[key] - previous[key]
+                if delta > min_delta_ms and metrics[key] > previous[key] * (1 + threshold):
+                    regressions.append(f'{size}/{name} {key}: {previous[key]} -> {metrics[key]}')
+            if metrics['queries'] > previous['queries']:
+                regressions.append(f"{size}/{name} queries: {previous['queries']} -> {metrics['queries']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Benchmark the hot routes at several dataset sizes.'
+    )
+    parser.add_argument('--sizes', default='small,medium', help=f"Comma-separated sizes ({', '.join(DATASET_SIZES)})")
+    parser.add_argument('--iterations', type=int, default=30, help='Timed requests per scenario')
+    parser.add_argument('--max-seconds', type=float, default=20.0, help='Time budget per scenario (min 3 samples)')
+    parser.add_argument('--output', default='benchmark_results.json', help='Where to write the JSON report')
+    parser.add_argument('--compare', help='Baseline JSON report to diff against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed relative latency increase')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore latency changes smaller than this')
+    parser.add_argument('--servers', help=f"Instead of timing routes, compare server modes ({', '.join(SERVER_COMMANDS)})")
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes (--servers)')
+    parser.add_argument('--slow-clients', type=int, default=50, help='Connections that trickle their request (--servers)')
+    parser.add_argument('--slow-seconds', type=float, default=2.0, help='Seconds each slow request takes to send (--servers)')
+    parser.add_argument('--requests', type=int, default=300, help='Normal requests timed per server (--servers)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Normal requests in flight at once (--servers)')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.iterations, args.max_seconds)))
+        return 0
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in DATASET_SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes: {', '.join(unknown)}")
+    servers = [server.strip() for server in (args.servers or '').split(',') if server.strip()]
+    unknown = [server for server in servers if server not in SERVER_COMMANDS]
+    if unknown:
+        parser.error(f"Unknown servers: {', '.join(unknown)}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'iterations': args.iterations,
+            'sizes': {size: DATASET_SIZES[size] for size in sizes},
+        },
+        'results': {},
+    }
+
+    if servers:
+        report['meta']['servers'] = {
+            key: getattr(args, key) for key in ('workers', 'slow_clients', 'slow_seconds', 'requests', 'concurrency')
+        }
+        report['concurrency'] = {}
+        for size in sizes:
+            print(f'Serving {size} dataset...', file=sys.stderr)
+            report['concurrency'][size] = run_servers(size, servers, args)
+            for server, metrics in report['concurrency'][size].items():
+                print(
+                    f"{size:>7} {server:<8} {metrics['requests_per_second']:>8.1f} req/s "
+                    f"p50={metrics['p50_ms']:>9.2f}ms p99={metrics['p99_ms']:>9.2f}ms "
+                    f"slow={metrics['slow_requests_completed']:>5} statuses={metrics['status_codes']}"
+                )
+
+    for size in [] if servers else sizes:
+        print(f'Running {size} dataset...', file=sys.stderr)
+        report['results'][size] = run_size(size, args.iterations, args.max_seconds)
+        for name, metrics in report['results'][size].items():
+            print(
+                f"{size:>7} {name:<18} p50={metrics['p50_ms']:>9.2f}ms p99={metrics['p99_ms']:>9.2f}ms "
+                f"queries={metrics['queries']:>5} peak={metrics['peak_memory_kb']:>9.1f}KB"
+            )
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+    print(f'Report written to {args.output}', file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare_reports(baseline, report, args.threshold, args.min_delta_ms)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            return 1
+        print('No regressions against baseline')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
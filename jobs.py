@@ -0,0 +1,190 @@
+"""
+Background jobs for the Business Rating App.
+Long admin operations are stored as rows in a job table and run outside the
+HTTP request by a worker thread (or a separate ``flask run-jobs`` process).
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+logger = logging.getLogger(__name__)
+
+
+class JobContext:
+    """Handed to a job handler so it can report progress between chunks."""
+
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.id = job_id
+
+    def progress(self, done, total=None, message=None):
+        """Record progress and commit the session, making the finished chunk durable."""
+        values = {'progress': done, 'heartbeat_at': datetime.utcnow()}
+        if total is not None:
+            values['total'] = total
+        if message is not None:
+            values['message'] = message
+        session = self.runner.db.session
+        session.execute(update(self.runner.model).where(self.runner.model.id == self.id).values(values))
+        session.commit()
+
+
+class JobRunner:
+    """Claims queued jobs from the job table and runs their registered handlers.
+
+    Several processes can run a worker against the same table: a job is claimed
+    with a conditional UPDATE, so only one of them runs it. While a handler runs,
+    a timer thread records a heartbeat every ``stale_after / 5`` seconds; jobs
+    whose worker stopped sending heartbeats are queued again, up to
+    ``max_attempts`` runs.
+    """
+
+    def __init__(self, app, db, model, poll_interval=2.0, stale_after=300.0, max_attempts=3):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.heartbeat_interval = stale_after / 5
+        self.max_attempts = max_attempts
+        self.handlers = {}
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread_pid = None
+
+    def task(self, kind):
+        """Register a handler, called as ``handler(job_context, **params)``; it returns the job result."""
+        def decorator(handler):
+            self.handlers[kind] = handler
+            return handler
+        return decorator
+
+    def enqueue(self, kind, params=None, created_by=None):
+        """Store a queued job and wake this process's worker; return the job."""
+        if kind not in self.handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        job = self.model(id=uuid.uuid4().hex, kind=kind, params=params or {}, created_by=created_by)
+        self.db.session.add(job)
+        self.db.session.commit()
+        self._wake.set()
+        return job
+
+    def start(self):
+        """Start the worker thread for this process if it is not running yet."""
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self.run_forever, name='job-runner', daemon=True).start()
+
+    def run_forever(self):
+        """Keep running jobs, sleeping up to ``poll_interval`` when the queue is empty."""
+        while True:
+            try:
+                ran = self.run_next()
+            except Exception:
+                logger.exception('Job runner failed to claim a job')
+                ran = False
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_pending(self):
+        """Run queued jobs in the calling thread until none are left; return how many ran."""
+        count = 0
+        while self.run_next():
+            count += 1
+        return count
+
+    def run_next(self):
+        """Claim and run one queued job; return False if there was nothing to do."""
+        with self.app.app_context():
+            job_id = self._claim()
+            if job_id is None:
+                return False
+            self._run(job_id)
+            return True
+
+    def _claim(self):
+        session = self.db.session
+        model = self.model
+        now = datetime.utcnow()
+        stale = (model.status == 'running', model.heartbeat_at < now - timedelta(seconds=self.stale_after))
+        # Idle polls only read: even an UPDATE matching no rows takes SQLite's write lock.
+        if session.execute(select(model.id).where(*stale).limit(1)).first() is not None:
+            session.execute(
+                update(model).where(*stale, model.attempts >= self.max_attempts)
+                .values(status='failed', error='Worker stopped responding', finished_at=now)
+            )
+            session.execute(update(model).where(*stale).values(status='queued'))
+            session.commit()
+
+        candidates = session.execute(
+            select(model.id).where(model.status == 'queued').order_by(model.created_at).limit(5)
+        ).scalars().all()
+        for job_id in candidates:
+            claimed = session.execute(
+                update(model)
+                .where(model.id == job_id, model.status == 'queued')
+                .values(status='running', started_at=now, heartbeat_at=now, attempts=model.attempts + 1)
+            ).rowcount
+            session.commit()
+            if claimed:
+                return job_id
+        return None
+
+    def _run(self, job_id):
+        session = self.db.session
+        job = session.get(self.model, job_id)
+        kind, params = job.kind, job.params or {}
+        handler = self.handlers.get(kind)
+        started = time.perf_counter()
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._send_heartbeats, args=(job_id, stop_heartbeat), name='job-heartbeat', daemon=True
+        )
+        heartbeat.start()
+        try:
+            if handler is None:
+                raise ValueError(f'Unknown job kind: {kind}')
+            result = handler(JobContext(self, job_id), **params)
+        except Exception as exc:
+            session.rollback()
+            logger.exception('Job %s (%s) failed', job_id, kind)
+            values = {'status': 'failed', 'error': str(exc) or type(exc).__name__}
+        else:
+            values = {
+                'status': 'succeeded',
+                'result': result,
+                'message': f'Finished in {time.perf_counter() - started:.1f}s',
+            }
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        values['finished_at'] = datetime.utcnow()
+        session.execute(update(self.model).where(self.model.id == job_id).values(values))
+        session.commit()
+
+    def _send_heartbeats(self, job_id, stop):
+        """Keep a running job's heartbeat fresh, even if its handler never reports progress."""
+        model = self.model
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                # A separate app context gives this thread its own session and connection.
+                with self.app.app_context():
+                    session = self.db.session
+                    session.execute(
+                        update(model).where(model.id == job_id, model.status == 'running')
+                        .values(heartbeat_at=datetime.utcnow())
+                    )
+                    session.commit()
+            except Exception:
+                logger.warning('Could not record heartbeat for job %s', job_id, exc_info=True)
@@ -0,0 +1,268 @@
+"""
+Request metrics for the Business Rating App.
+Keeps per-endpoint counters and histograms in memory and periodically writes a
+snapshot per process so every gunicorn worker shows up in the Prometheus output.
+Snapshots of exited processes are folded into one aggregate file, so the
+directory stays as small as the number of live workers.
+"""
+
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead snapshots are kept rather than folded.
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+AGGREGATE_FILE = 'aggregate.json'
+
+
+def _empty_histogram(buckets):
+    return {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+
+
+def _observe(histogram, buckets, value):
+    for index, bound in enumerate(buckets):
+        if value <= bound:
+            histogram['buckets'][index] += 1
+    histogram['sum'] += value
+    histogram['count'] += 1
+
+
+def _merge_histogram(target, source):
+    target['buckets'] = [a + b for a, b in zip(target['buckets'], source['buckets'])]
+    target['sum'] += source['sum']
+    target['count'] += source['count']
+
+
+def _merge_state(target, source):
+    for key, value in source['requests'].items():
+        target['requests'][key] = target['requests'].get(key, 0) + value
+    for family, buckets in (('latency', LATENCY_BUCKETS), ('size', SIZE_BUCKETS), ('statements', STATEMENT_BUCKETS)):
+        for key, histogram in source[family].items():
+            _merge_histogram(target[family].setdefault(key, _empty_histogram(buckets)), histogram)
+    for key, sql in source['sql'].items():
+        merged = target['sql'].setdefault(key, {'count': 0, 'seconds': 0.0})
+        merged['count'] += sql['count']
+        merged['seconds'] += sql['seconds']
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, payload):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        handle.write(json.dumps(payload))
+    os.replace(temp_path, path)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+class MetricsRegistry:
+    """Per-process request metrics with file-based aggregation across workers."""
+
+    def __init__(self, multiprocess_dir=None, flush_interval=5.0):
+        if multiprocess_dir is None:
+            # Workers forked by the same gunicorn master share a parent pid.
+            multiprocess_dir = os.path.join(
+                tempfile.gettempdir(), f'business-ratings-metrics-{os.getppid()}'
+            )
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._snapshot_pid = None
+        self._snapshot_path = None
+        self._state = self._empty_state()
+
+    @staticmethod
+    def _empty_state():
+        return {'requests': {}, 'latency': {}, 'size': {}, 'statements': {}, 'sql': {}}
+
+    def observe_request(self, endpoint, method, status, duration, response_size, statement_count, statement_seconds):
+        """Record one finished request."""
+        route_key = f'{endpoint}|{method}'
+        status_key = f'{endpoint}|{method}|{status}'
+        with self._lock:
+            state = self._state
+            state['requests'][status_key] = state['requests'].get(status_key, 0) + 1
+            _observe(state['latency'].setdefault(route_key, _empty_histogram(LATENCY_BUCKETS)), LATENCY_BUCKETS, duration)
+            if response_size is not None:
+                _observe(state['size'].setdefault(route_key, _empty_histogram(SIZE_BUCKETS)), SIZE_BUCKETS, response_size)
+            _observe(
+                state['statements'].setdefault(endpoint, _empty_histogram(STATEMENT_BUCKETS)),
+                STATEMENT_BUCKETS,
+                statement_count,
+            )
+            sql = state['sql'].setdefault(endpoint, {'count': 0, 'seconds': 0.0})
+            sql['count'] += statement_count
+            sql['seconds'] += statement_seconds
+
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _own_snapshot_path(self):
+        # Recomputed after a fork so a worker never overwrites its parent's file.
+        if self._snapshot_pid != os.getpid():
+            self._snapshot_pid = os.getpid()
+            self._snapshot_path = os.path.join(
+                self.multiprocess_dir, f'{os.getpid()}-{int(time.time() * 1000)}.json'
+            )
+        return self._snapshot_path
+
+    def flush(self):
+        """Write this process's counters to the shared directory."""
+        with self._lock:
+            payload = json.loads(json.dumps(self._state))
+            self._last_flush = time.monotonic()
+        first_flush = self._snapshot_pid != os.getpid()
+        path = self._own_snapshot_path()
+        try:
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+            _write_json(path, payload)
+        except OSError:
+            pass
+        if first_flush:
+            # A new worker usually replaces one that exited.
+            self.fold_dead_snapshots()
+
+    def fold_dead_snapshots(self):
+        """Add the snapshots of exited processes to the aggregate file and delete them.
+
+        The aggregate lists the files it absorbed last, so a reader that still
+        saw one of them in its glob does not count it twice.
+        """
+        if fcntl is None:
+            return
+        try:
+            lock = open(os.path.join(self.multiprocess_dir, 'aggregate.lock'), 'a')
+        except OSError:
+            return
+        with lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # Another process is folding right now.
+            dead = []
+            for path in glob.glob(os.path.join(self.multiprocess_dir, '*-*.json')):
+                try:
+                    pid = int(os.path.basename(path).split('-', 1)[0])
+                except ValueError:
+                    continue
+                if not _pid_alive(pid):
+                    dead.append(path)
+            if not dead:
+                return
+
+            aggregate_path = os.path.join(self.multiprocess_dir, AGGREGATE_FILE)
+            aggregate = _read_json(aggregate_path) or {'state': self._empty_state()}
+            folded = []
+            for path in dead:
+                snapshot = _read_json(path)
+                if snapshot is not None:
+                    _merge_state(aggregate['state'], snapshot)
+                folded.append(os.path.basename(path))
+            aggregate['folded'] = folded
+            try:
+                _write_json(aggregate_path, aggregate)
+            except OSError:
+                return
+            for path in dead:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def collect(self):
+        """Merge the snapshots of every worker, using live counters for this process."""
+        self.fold_dead_snapshots()
+        own_path = self._own_snapshot_path()
+        with self._lock:
+            merged = json.loads(json.dumps(self._state))
+        # Read worker files before the aggregate: a file folded in the meantime is
+        # then listed in the aggregate's "folded" names and skipped.
+        snapshots = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, '*-*.json')):
+            if path == own_path:
+                continue
+            snapshot = _read_json(path)
+            if snapshot is not None:
+                snapshots[os.path.basename(path)] = snapshot
+        aggregate = _read_json(os.path.join(self.multiprocess_dir, AGGREGATE_FILE))
+        if aggregate is not None:
+            _merge_state(merged, aggregate['state'])
+            for name in aggregate.get('folded', []):
+                snapshots.pop(name, None)
+
+        for snapshot in snapshots.values():
+            _merge_state(merged, snapshot)
+        return merged
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        state = self.collect()
+        lines = [
+            '# HELP http_requests_total Requests by endpoint, method and status code.',
+            '# TYPE http_requests_total counter',
+        ]
+        for key, value in sorted(state['requests'].items()):
+            endpoint, method, status = key.split('|')
+            lines.append(f'http_requests_total{{{_labels(endpoint=endpoint, method=method, status=status)}}} {value}')
+
+        def histogram_lines(name, help_text, family, buckets, label_names):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for key, histogram in sorted(state[family].items()):
+                label_values = dict(zip(label_names, key.split('|')))
+                for bound, count in zip(buckets, histogram['buckets']):
+                    lines.append(f'{name}_bucket{{{_labels(**label_values, le=bound)}}} {count}')
+                lines.append(f'{name}_bucket{{{_labels(**label_values, le="+Inf")}}} {histogram["count"]}')
+                lines.append(f'{name}_sum{{{_labels(**label_values)}}} {histogram["sum"]}')
+                lines.append(f'{name}_count{{{_labels(**label_values)}}} {histogram["count"]}')
+
+        histogram_lines('http_request_duration_seconds', 'Request latency by endpoint.',
+                        'latency', LATENCY_BUCKETS, ('endpoint', 'method'))
+        histogram_lines('http_response_size_bytes', 'Response body size by endpoint.',
+                        'size', SIZE_BUCKETS, ('endpoint', 'method'))
+        histogram_lines('db_statements_per_request', 'SQL statements issued per request.',
+                        'statements', STATEMENT_BUCKETS, ('endpoint',))
+
+        lines.append('# HELP db_statements_total SQL statements executed by endpoint.')
+        lines.append('# TYPE db_statements_total counter')
+        for endpoint, sql in sorted(state['sql'].items()):
+            lines.append(f'db_statements_total{{{_labels(endpoint=endpoint)}}} {sql["count"]}')
+        lines.append('# HELP db_statement_duration_seconds_total Time spent in SQL by endpoint.')
+        lines.append('# TYPE db_statement_duration_seconds_total counter')
+        for endpoint, sql in sorted(state['sql'].items()):
+            lines.append(f'db_statement_duration_seconds_total{{{_labels(endpoint=endpoint)}}} {sql["seconds"]}')
+
+        return '\n'.join(lines) + '\n'
@@ -1,17 +1,50 @@
 import 'package:dio/dio.dart';
 import '../models/business.dart';
+import '../models/business_facets.dart';
+import '../models/catalog_sync.dart';
 import '../models/rating.dart';
 
 class BusinessApi {
   final Dio dio;
   BusinessApi(this.dio);
 
-  Future<List<Business>> getBusinesses() async {
-    final response = await dio.get('/api/businesses');
+  Future<List<Business>> getBusinesses({List<int> sectorIds = const [], List<String> locations = const []}) async {
+    final response = await dio.get(
+      '/api/businesses',
+      queryParameters: _catalogFilters(sectorIds, locations),
+    );
     final data = response.data as List<dynamic>;
     return data.map((json) => Business.fromJson(json as Map<String, dynamic>)).toList();
   }
 
+  Future<BusinessFacets> getFacets({List<int> sectorIds = const [], List<String> locations = const []}) async {
+    final response = await dio.get('/api/facets', queryParameters: _catalogFilters(sectorIds, locations));
+    return BusinessFacets.fromJson(response.data as Map<String, dynamic>);
+  }
+
+  /// Repeated `sector_id` / `location` parameters, as the filters accept several values.
+  Map<String, dynamic> _catalogFilters(List<int> sectorIds, List<String> locations) {
+    return {
+      if (sectorIds.isNotEmpty) 'sector_id': sectorIds,
+      if (locations.isNotEmpty) 'location': locations,
+    };
+  }
+
+  Future<CatalogSnapshot> bootstrap() async {
+    final response = await dio.get('/api/v2/bootstrap');
+    return CatalogSnapshot.fromJson(response.data as Map<String, dynamic>);
+  }
+
+  /// Returns [CatalogChanges] since [token]. A 410 response means the token
+  /// expired and the client should call [bootstrap] again.
+  Future<CatalogChanges> getChanges(String token, {Map<int, String> knownSectorNames = const {}}) async {
+    final response = await dio.get('/api/v2/changes', queryParameters: {'since': token});
+    return CatalogChanges.fromJson(
+      response.data as Map<String, dynamic>,
+      knownSectorNames: knownSectorNames,
+    );
+  }
+
   Future<List<Rating>> getRatingsForBusiness(int businessId) async {
     final response = await dio.get('/api/ratings/business/$businessId');
     final data = response.data as List<dynamic>;
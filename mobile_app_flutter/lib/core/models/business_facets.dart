@@ -0,0 +1,53 @@
+class SectorFacet {
+  final int id;
+  final String name;
+  final int count;
+
+  const SectorFacet({required this.id, required this.name, required this.count});
+
+  factory SectorFacet.fromJson(Map<String, dynamic> json) {
+    return SectorFacet(
+      id: (json['id'] as num).toInt(),
+      name: json['name']?.toString() ?? '',
+      count: (json['count'] as num?)?.toInt() ?? 0,
+    );
+  }
+}
+
+class LocationFacet {
+  /// Normalized value to send back as the `location` filter.
+  final String value;
+  final String label;
+  final int count;
+
+  const LocationFacet({required this.value, required this.label, required this.count});
+
+  factory LocationFacet.fromJson(Map<String, dynamic> json) {
+    return LocationFacet(
+      value: json['value']?.toString() ?? '',
+      label: json['label']?.toString() ?? '',
+      count: (json['count'] as num?)?.toInt() ?? 0,
+    );
+  }
+}
+
+/// Filter counts returned by `/api/facets`.
+class BusinessFacets {
+  final List<SectorFacet> sectors;
+  final List<LocationFacet> locations;
+  final int total;
+
+  const BusinessFacets({required this.sectors, required this.locations, required this.total});
+
+  factory BusinessFacets.fromJson(Map<String, dynamic> json) {
+    return BusinessFacets(
+      sectors: ((json['sectors'] as List<dynamic>?) ?? const [])
+          .map((item) => SectorFacet.fromJson(item as Map<String, dynamic>))
+          .toList(),
+      locations: ((json['locations'] as List<dynamic>?) ?? const [])
+          .map((item) => LocationFacet.fromJson(item as Map<String, dynamic>))
+          .toList(),
+      total: (json['total'] as num?)?.toInt() ?? 0,
+    );
+  }
+}
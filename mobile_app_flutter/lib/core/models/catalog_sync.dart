@@ -0,0 +1,106 @@
+import 'business.dart';
+import 'rating.dart';
+
+class SyncTable {
+  final List<String> columns;
+  final List<List<dynamic>> rows;
+
+  const SyncTable({required this.columns, required this.rows});
+
+  factory SyncTable.fromJson(Map<String, dynamic>? json) {
+    return SyncTable(
+      columns: ((json?['columns'] as List<dynamic>?) ?? const []).map((c) => c.toString()).toList(),
+      rows: ((json?['rows'] as List<dynamic>?) ?? const []).map((r) => r as List<dynamic>).toList(),
+    );
+  }
+
+  List<Map<String, dynamic>> get records =>
+      rows.map((row) => Map<String, dynamic>.fromIterables(columns, row)).toList();
+}
+
+Map<int, String> _sectorNames(SyncTable sectors) {
+  return {
+    for (final record in sectors.records)
+      (record['id'] as num).toInt(): record['name']?.toString() ?? '',
+  };
+}
+
+List<Business> _businesses(SyncTable businesses, Map<int, String> sectorNames) {
+  return businesses.records.map((record) {
+    final sectorId = (record['sector_id'] as num?)?.toInt();
+    return Business.fromJson({...record, 'sector': sectorNames[sectorId]});
+  }).toList();
+}
+
+List<int> _ids(dynamic values) {
+  return ((values as List<dynamic>?) ?? const []).map((id) => (id as num).toInt()).toList();
+}
+
+/// Full catalog returned by `/api/v2/bootstrap`.
+class CatalogSnapshot {
+  final String token;
+  final Map<int, String> sectorNames;
+  final List<Business> businesses;
+
+  const CatalogSnapshot({required this.token, required this.sectorNames, required this.businesses});
+
+  factory CatalogSnapshot.fromJson(Map<String, dynamic> json) {
+    final sectorNames = _sectorNames(SyncTable.fromJson(json['sectors'] as Map<String, dynamic>?));
+    return CatalogSnapshot(
+      token: json['token']?.toString() ?? '',
+      sectorNames: sectorNames,
+      businesses: _businesses(SyncTable.fromJson(json['businesses'] as Map<String, dynamic>?), sectorNames),
+    );
+  }
+}
+
+/// Rows changed since a token, from `/api/v2/changes`.
+///
+/// Apply upserts first, then deletions. A deleted sector or business implies
+/// the deletion of everything below it. Keep calling with [token] while
+/// [hasMore] is true.
+class CatalogChanges {
+  final String token;
+  final bool hasMore;
+  final Map<int, String> sectorNames;
+  final List<Business> businesses;
+  final Map<int, List<Rating>> ratingsByBusiness;
+  final List<int> deletedSectorIds;
+  final List<int> deletedBusinessIds;
+  final List<int> deletedRatingIds;
+
+  const CatalogChanges({
+    required this.token,
+    required this.hasMore,
+    required this.sectorNames,
+    required this.businesses,
+    required this.ratingsByBusiness,
+    required this.deletedSectorIds,
+    required this.deletedBusinessIds,
+    required this.deletedRatingIds,
+  });
+
+  factory CatalogChanges.fromJson(Map<String, dynamic> json, {Map<int, String> knownSectorNames = const {}}) {
+    final sectorNames = {
+      ...knownSectorNames,
+      ..._sectorNames(SyncTable.fromJson(json['sectors'] as Map<String, dynamic>?)),
+    };
+    final ratingsByBusiness = <int, List<Rating>>{};
+    for (final record in SyncTable.fromJson(json['ratings'] as Map<String, dynamic>?).records) {
+      final businessId = (record['business_id'] as num).toInt();
+      ratingsByBusiness.putIfAbsent(businessId, () => []).add(Rating.fromJson(record));
+    }
+    final deleted = (json['deleted'] as Map<String, dynamic>?) ?? const {};
+
+    return CatalogChanges(
+      token: json['token']?.toString() ?? '',
+      hasMore: json['has_more'] == true,
+      sectorNames: sectorNames,
+      businesses: _businesses(SyncTable.fromJson(json['businesses'] as Map<String, dynamic>?), sectorNames),
+      ratingsByBusiness: ratingsByBusiness,
+      deletedSectorIds: _ids(deleted['sectors']),
+      deletedBusinessIds: _ids(deleted['businesses']),
+      deletedRatingIds: _ids(deleted['ratings']),
+    );
+  }
+}
@@ -0,0 +1,132 @@
+"""
+On-demand request profiling for the Business Rating App.
+A background thread samples the request thread's Python stack and folds the
+samples into collapsed stacks that flamegraph.pl and speedscope can read.
+"""
+
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Samples the stack of one thread at a fixed interval until stopped."""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+
+    def start(self):
+        # Let the sampler grab the GIL at its own pace instead of every 5 ms.
+        self._previous_switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._previous_switch_interval, self.interval / 4))
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._previous_switch_interval)
+        return self.stacks
+
+    def collapsed(self):
+        """Return samples in the collapsed-stack format, one ``stack count`` per line."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class ProfileRateLimiter:
+    """Allows one profiled request at a time and at most one per interval per process."""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._running = False
+        self._last_started = None
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._running:
+                return False
+            if self._last_started is not None and now - self._last_started < self.min_interval:
+                return False
+            self._running = True
+            self._last_started = now
+            return True
+
+    def release(self):
+        with self._lock:
+            self._running = False
+
+
+class ProfileStore:
+    """Keeps the most recent profile reports as JSON files in a directory."""
+
+    def __init__(self, directory, keep=50):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, profile_id):
+        return os.path.join(self.directory, f'{profile_id}.json')
+
+    def save(self, report):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        report = dict(report, id=profile_id)
+        with open(self._path(profile_id), 'w', encoding='utf-8') as handle:
+            json.dump(report, handle)
+
+        reports = sorted(glob.glob(os.path.join(self.directory, '*.json')), key=os.path.getmtime)
+        for path in reports[:-self.keep]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return profile_id
+
+    def load(self, profile_id):
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(self._path(profile_id), encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def list(self):
+        summaries = []
+        paths = sorted(glob.glob(os.path.join(self.directory, '*.json')), key=os.path.getmtime, reverse=True)
+        for path in paths:
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    report = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            summaries.append({key: report.get(key) for key in (
+                'id', 'method', 'path', 'endpoint', 'status', 'started_at', 'duration_ms', 'sql_ms', 'samples'
+            )})
+        return summaries
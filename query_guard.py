@@ -0,0 +1,74 @@
+"""
+SQL query guards for the Business Rating App.
+Lets views declare a statement budget, flags repeated identical statements as
+suspected N+1 queries and reports slow statements with the route that ran them.
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view or block issues more SQL statements than allowed."""
+
+
+def query_budget(max_statements):
+    """Declare the maximum number of SQL statements a view may issue per request."""
+    def decorator(view):
+        view.query_budget = max_statements
+        return view
+    return decorator
+
+
+def inspect_statements(statements, route, logger, budget=None, repeat_threshold=5,
+                       slow_query_ms=None, check_patterns=True):
+    """Log slow and repeated statements and return a budget violation message, if any.
+
+    ``statements`` is a list of ``(sql, seconds)`` tuples collected for one request.
+    """
+    if slow_query_ms is not None:
+        for sql, seconds in statements:
+            if seconds * 1000 >= slow_query_ms:
+                logger.warning('Slow query (%.1f ms) in %s: %s', seconds * 1000, route, sql)
+
+    if not check_patterns:
+        return None
+
+    for sql, repeats in Counter(sql for sql, _ in statements).items():
+        if repeats >= repeat_threshold:
+            logger.warning('Suspected N+1 in %s: statement ran %d times: %s', route, repeats, sql)
+
+    if budget is not None and len(statements) > budget:
+        message = f'{route} issued {len(statements)} SQL statements (budget {budget})'
+        logger.warning('Query budget exceeded: %s', message)
+        return message
+    return None
+
+
+@contextmanager
+def capture_queries():
+    """Collect the SQL text of every statement executed inside the block."""
+    captured = []
+
+    def collect(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    event.listen(Engine, 'after_cursor_execute', collect)
+    try:
+        yield captured
+    finally:
+        event.remove(Engine, 'after_cursor_execute', collect)
+
+
+@contextmanager
+def assert_max_queries(max_statements):
+    """Fail if the block executes more than ``max_statements`` SQL statements."""
+    with capture_queries() as captured:
+        yield captured
+    if len(captured) > max_statements:
+        raise QueryBudgetExceeded(
+            f'{len(captured)} SQL statements executed (budget {max_statements}):\n' + '\n'.join(captured)
+        )
@@ -0,0 +1,111 @@
+"""
+Token-bucket rate limiting for the Business Rating App.
+Buckets live in a small SQLite file so every gunicorn worker on the host
+draws from the same buckets; an in-memory store is available for single processes.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+
+def parse_limit(value):
+    """Parse ``"capacity/seconds"`` into (capacity, seconds to refill a full bucket)."""
+    capacity, _, period = value.partition('/')
+    capacity, period = float(capacity), float(period)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f'Invalid rate limit: {value}')
+    return capacity, period
+
+
+def _refill(tokens, updated, capacity, period, now):
+    return min(capacity, tokens + (now - updated) * capacity / period)
+
+
+class MemoryBucketStore:
+    """Token buckets for a single process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, key, capacity, period, now=None):
+        """Take one token; return 0 if allowed, otherwise seconds until one is available."""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, capacity, period, now)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) * period / capacity
+
+
+class SQLiteBucketStore:
+    """Token buckets shared by every process that opens the same SQLite file."""
+
+    PURGE_EVERY = 1000
+    IDLE_SECONDS = 3600
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._calls = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Bucket state is disposable, so skip fsync on every request.
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def consume(self, key, capacity, period, now=None):
+        """Take one token; return 0 if allowed, otherwise seconds until one is available."""
+        now = time.time() if now is None else now
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = capacity if row is None else _refill(row[0], row[1], capacity, period, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            connection.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)', (key, tokens, now)
+            )
+            self._calls += 1
+            if self._calls % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM buckets WHERE updated < ?', (now - self.IDLE_SECONDS,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return 0 if allowed else (1 - tokens) * period / capacity
+
+
+class RateLimiter:
+    """Checks a request against several buckets (for example per IP and per user)."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def check(self, rules, now=None):
+        """Consume from each ``(key, capacity, period)`` rule; return the longest wait, 0 if allowed."""
+        retry_after = 0
+        for key, capacity, period in rules:
+            retry_after = max(retry_after, self.store.consume(key, capacity, period, now=now))
+        return retry_after
@@ -0,0 +1,194 @@
+"""
+Live rating updates for the Business Rating App.
+Rating events fan out to Server-Sent Events subscribers in this process and,
+through Unix datagram sockets in a shared directory, to every other worker.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+MAX_DATAGRAM_BYTES = 4096
+
+
+class Subscription:
+    """Pending events for one client, keeping only the latest event per business."""
+
+    def __init__(self, business_id=None, max_pending=100, waker=None):
+        self.business_id = business_id
+        self.max_pending = max_pending
+        self.waker = waker
+        self.dropped = 0
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+
+    def wants(self, event):
+        return self.business_id is None or event.get('business_id') == self.business_id
+
+    def push(self, event):
+        with self._condition:
+            key = event.get('business_id')
+            self._pending.pop(key, None)
+            self._pending[key] = event
+            if len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._condition.notify()
+        if self.waker is not None:
+            self.waker()
+
+    def next_events(self, timeout):
+        """Wait up to ``timeout`` seconds and return every pending event (possibly none)."""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            events = list(self._pending.values())
+            self._pending.clear()
+            return events
+
+
+class RatingEventHub:
+    """In-process fan-out with optional cross-process delivery over Unix datagram sockets."""
+
+    def __init__(self, ipc_dir=None, name=None, max_subscribers=500, max_pending=100):
+        self.ipc_dir = ipc_dir
+        self.name = name
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._socket = None
+        self._socket_path = None
+        self._socket_pid = None
+
+    def subscribe(self, business_id=None, waker=None, limit=None):
+        """Register a subscriber, or return None when this process is at capacity.
+
+        ``waker`` is called from the publishing thread after each pushed event, and
+        ``limit`` replaces max_subscribers for this call.
+        """
+        self._ensure_listener()
+        with self._lock:
+            if len(self._subscribers) >= (self.max_subscribers if limit is None else limit):
+                return None
+            subscription = Subscription(business_id, self.max_pending, waker)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        """Deliver an event to local subscribers and to every other worker."""
+        self._dispatch(event)
+        if not self._ensure_listener():
+            return
+
+        payload = json.dumps(event).encode('utf-8')
+        if len(payload) > MAX_DATAGRAM_BYTES:
+            return
+        for path in glob.glob(os.path.join(self.ipc_dir, '*.sock')):
+            if path == self._socket_path:
+                continue
+            try:
+                self._socket.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker that owned this socket is gone.
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            except OSError:
+                # Peer buffer full: drop the event for that worker rather than block.
+                continue
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.wants(event):
+                subscription.push(event)
+
+    def _ensure_listener(self):
+        """Bind this process's socket and start its reader thread; False if IPC is unavailable."""
+        if not self.ipc_dir or not hasattr(socket, 'AF_UNIX'):
+            return False
+        if self._socket_pid == os.getpid():
+            return self._socket is not None
+
+        with self._lock:
+            if self._socket_pid == os.getpid():
+                return self._socket is not None
+            self._socket_pid = os.getpid()
+            self._socket = None
+            try:
+                os.makedirs(self.ipc_dir, exist_ok=True)
+                path = os.path.join(self.ipc_dir, f'{self.name or os.getpid()}.sock')
+                if os.path.exists(path):
+                    os.remove(path)
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                sock.bind(path)
+            except OSError:
+                return False
+            self._socket = sock
+            self._socket_path = path
+
+        threading.Thread(target=self._listen, args=(sock,), name='rating-event-listener', daemon=True).start()
+        return True
+
+    def _listen(self, sock):
+        while True:
+            try:
+                payload = sock.recv(MAX_DATAGRAM_BYTES)
+                self._dispatch(json.loads(payload.decode('utf-8')))
+            except ValueError:
+                continue
+            except OSError:
+                return
+
+
+def event_stream(hub, subscription, heartbeat=15.0, max_seconds=300.0):
+    """Yield SSE frames for a subscription until the client leaves or the stream expires."""
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            events = subscription.next_events(timeout=min(heartbeat, max(deadline - time.monotonic(), 0)))
+            if not events:
+                yield ': heartbeat\n\n'
+                continue
+            for event in events:
+                yield f'event: rating\ndata: {json.dumps(event)}\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def async_event_stream(hub, subscription, ready, heartbeat=15.0, max_seconds=300.0):
+    """event_stream for an event loop; ``ready`` is an asyncio.Event set by the subscription's waker."""
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            try:
+                await asyncio.wait_for(ready.wait(), min(heartbeat, max(deadline - time.monotonic(), 0)))
+            except asyncio.TimeoutError:
+                pass
+            ready.clear()
+            events = subscription.next_events(timeout=0)
+            if not events:
+                yield ': heartbeat\n\n'
+                continue
+            for event in events:
+                yield f'event: rating\ndata: {json.dumps(event)}\n\n'
+    finally:
+        hub.unsubscribe(subscription)
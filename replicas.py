@@ -0,0 +1,119 @@
+"""
+Read-replica routing for the Business Rating App.
+SELECTs issued during read-only requests go to a healthy replica chosen
+round-robin; everything else, and every read after a write, uses the primary.
+"""
+
+import itertools
+import threading
+import time
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import Select
+
+
+def normalize_database_url(url):
+    if url.startswith('postgres://'):
+        return url.replace('postgres://', 'postgresql://', 1)
+    return url
+
+
+class ReplicaPool:
+    """Round-robin over replica engines, skipping ones that fail health checks."""
+
+    def __init__(self, urls=(), check_interval=10.0, retry_after=30.0, engine_options=None):
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self.engine_options = engine_options or {}
+        self._lock = threading.Lock()
+        self._engines = []
+        self._health = {}
+        self._cycle = iter(())
+        self.configure(urls)
+
+    def configure(self, urls):
+        """Replace the replica set, disposing engines that are no longer used."""
+        engines = []
+        for url in urls:
+            engine = create_engine(normalize_database_url(url), pool_pre_ping=True, **self.engine_options)
+            event.listen(engine, 'handle_error', self._on_error)
+            engines.append(engine)
+
+        with self._lock:
+            previous = self._engines
+            self._engines = engines
+            self._health = {engine: {'ok': True, 'checked_at': 0.0} for engine in engines}
+            self._cycle = itertools.cycle(engines)
+        for engine in previous:
+            engine.dispose()
+
+    @property
+    def enabled(self):
+        return bool(self._engines)
+
+    def _on_error(self, context):
+        if context.is_disconnect and context.engine in self._health:
+            self.mark_failed(context.engine)
+
+    def mark_failed(self, engine):
+        with self._lock:
+            self._health[engine] = {'ok': False, 'checked_at': time.monotonic()}
+
+    def _is_healthy(self, engine):
+        state = self._health.get(engine)
+        if state is None:
+            return False
+        age = time.monotonic() - state['checked_at']
+        if (state['ok'] and age < self.check_interval) or (not state['ok'] and age < self.retry_after):
+            return state['ok']
+
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            healthy = True
+        except SQLAlchemyError:
+            healthy = False
+        with self._lock:
+            self._health[engine] = {'ok': healthy, 'checked_at': time.monotonic()}
+        return healthy
+
+    def choose(self):
+        """Return the next healthy replica engine, or None to fall back to the primary."""
+        with self._lock:
+            candidates = [next(self._cycle) for _ in range(len(self._engines))]
+        for engine in candidates:
+            if self._is_healthy(engine):
+                return engine
+        return None
+
+    def status(self):
+        return [
+            {'url': engine.url.render_as_string(hide_password=True), 'healthy': state['ok']}
+            for engine, state in self._health.items()
+        ]
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to a replica while ``info['use_replica']`` is set.
+
+    Any non-SELECT statement or flush sets ``info['wrote']``, after which the
+    session stays on the primary so the request reads its own writes.
+    """
+
+    def __init__(self, db, replica_pool=None, **kwargs):
+        super().__init__(db, **kwargs)
+        self.replica_pool = replica_pool
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.replica_pool is not None:
+            if self._flushing or not isinstance(clause, Select):
+                self.info['wrote'] = True
+            elif self.info.get('use_replica') and not self.info.get('wrote'):
+                # Pin one replica per session so a request sees a single snapshot.
+                if 'replica' not in self.info:
+                    self.info['replica'] = self.replica_pool.choose()
+                if self.info['replica'] is not None:
+                    return self.info['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -1,5 +1,47 @@
+import atexit
+import base64
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
 import pytest
-from app import app
+
+# Point the app at a throwaway database and files before importing it, so test
+# users, ratings, profiles, metrics and rate-limit buckets never land in instance/.
+TEST_DIR = tempfile.mkdtemp(prefix='business-ratings-tests-')
+atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DIR, 'business_ratings.db')}"
+os.environ['PROFILE_DIR'] = os.path.join(TEST_DIR, 'profiles')
+os.environ['METRICS_MULTIPROC_DIR'] = os.path.join(TEST_DIR, 'metrics')
+os.environ['RATE_LIMIT_STORAGE'] = os.path.join(TEST_DIR, 'rate_limits.sqlite3')
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+from app import (
+    app, configure_read_replicas, db, Business, BusinessRatingStats, DeletedRecord, Rating, RatingDailyRollup,
+    Sector, User, encode_sync_token,
+)
+from datetime import datetime, timedelta
+from metrics import MetricsRegistry
+from rating_stream import RatingEventHub
+from query_guard import QueryBudgetExceeded, assert_max_queries, capture_queries, inspect_statements
+from rate_limit import MemoryBucketStore, SQLiteBucketStore
+import app as app_module
+
+# Rate limits are exercised explicitly below; the rest of the suite logs in freely.
+app.config['RATE_LIMIT_ENABLED'] = False
+# A DATABASE_URL makes the app treat itself as deployed; the test client talks plain HTTP.
+app.config['SESSION_COOKIE_SECURE'] = False
+app.config['REMEMBER_COOKIE_SECURE'] = False
 
 @pytest.fixture
 
@@ -9,6 +51,23 @@ def client():
         yield client
 
 
+def create_user(is_admin=False, password='secret-pass'):
+    username = f'test_{uuid.uuid4().hex[:12]}'
+    with app.app_context():
+        user = User(username=username, email=f'{username}@example.com', is_admin=is_admin)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+    return username, password
+
+
+def login(client, is_admin=False):
+    username, password = create_user(is_admin=is_admin)
+    resp = client.post('/login', json={'username': username, 'password': password})
+    assert resp.status_code == 200
+    return username
+
+
 def test_index(client):
     resp = client.get('/')
     assert resp.status_code == 200
@@ -25,3 +84,736 @@ def test_404_handler(client):
     resp = client.get('/route-that-does-not-exist')
     assert resp.status_code == 404
     assert resp.get_json().get('error') == 'Not found'
+
+
+def test_seed_scale_generates_reproducible_dataset():
+    runner = app.test_cli_runner()
+    seed = random.randint(10**6, 10**7)
+    args = ['seed-scale', '--sectors', '3', '--businesses', '10', '--users', '8',
+            '--ratings', '50', '--seed', str(seed), '--batch-size', '7']
+    result = runner.invoke(args=args)
+    assert result.exit_code == 0, result.output
+    assert 'Ratings: 50' in result.output
+
+    with app.app_context():
+        businesses = Business.query.filter(Business.name.like(f'Scale Business {seed}-%')).all()
+        business_ids = [b.id for b in businesses]
+        ratings = Rating.query.filter(Rating.business_id.in_(business_ids)).all()
+        assert len(businesses) == 10
+        assert len(ratings) == 50
+        assert all(1 <= r.score <= 5 for r in ratings)
+        pairs = {(r.user_id, r.business_id) for r in ratings}
+        assert len(pairs) == len(ratings)
+        assert sum(b.stats.rating_count for b in businesses) == 50
+
+    rerun = runner.invoke(args=args)
+    assert rerun.exit_code != 0
+    assert 'already exists' in rerun.output
+
+    with app.app_context():
+        BusinessRatingStats.query.filter(BusinessRatingStats.business_id.in_(business_ids)).delete(synchronize_session=False)
+        RatingDailyRollup.query.filter(RatingDailyRollup.business_id.in_(business_ids)).delete(synchronize_session=False)
+        Rating.query.filter(Rating.business_id.in_(business_ids)).delete(synchronize_session=False)
+        Business.query.filter(Business.id.in_(business_ids)).delete(synchronize_session=False)
+        Sector.query.filter(Sector.name.like(f'Scale Sector {seed}-%')).delete(synchronize_session=False)
+        User.query.filter(User.username.like(f'scale_{seed}_%')).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def test_metrics_requires_admin(client):
+    assert client.get('/metrics').status_code == 403
+    login(client)
+    assert client.get('/metrics').status_code == 403
+
+
+def test_metrics_exposes_prometheus_text(client):
+    login(client, is_admin=True)
+    client.get('/')
+    client.get('/api/businesses')
+    resp = client.get('/metrics')
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/plain'
+    body = resp.get_data(as_text=True)
+    assert 'http_requests_total{endpoint="index",method="GET",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{endpoint="get_businesses",method="GET",le="+Inf"}' in body
+    assert 'db_statements_total{endpoint="get_businesses"}' in body
+
+
+def test_metrics_fold_snapshots_of_exited_workers(tmp_path):
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    for pid in (exited.pid, exited.pid):
+        worker = MetricsRegistry(str(tmp_path))
+        worker.observe_request('index', 'GET', 200, 0.01, 100, 2, 0.001)
+        # Pretend the snapshot was written by the exited process.
+        os.replace(worker._own_snapshot_path(), tmp_path / f'{pid}-{uuid.uuid4().int % 10**6}.json')
+
+    scraper = MetricsRegistry(str(tmp_path))
+    assert scraper.collect()['requests'] == {'index|GET|200': 2}
+    assert sorted(path.name for path in tmp_path.glob('*.json')) == ['aggregate.json']
+    assert scraper.collect()['requests'] == {'index|GET|200': 2}
+
+
+def test_hot_routes_stay_within_query_budgets(client):
+    with app.app_context():
+        business = Business.query.first()
+    login(client, is_admin=True)
+    for path in ['/', f'/sector/{business.sector_id}', f'/business/{business.id}',
+                 '/api/businesses', f'/api/ratings/business/{business.id}', '/admin/data-health']:
+        assert client.get(path).status_code == 200, path
+    resp = client.post('/api/rate', json={'business_id': business.id, 'score': 4})
+    assert resp.status_code == 201
+
+
+def test_assert_max_queries_fails_when_budget_exceeded():
+    with app.app_context():
+        with assert_max_queries(2):
+            Sector.query.count()
+        with pytest.raises(QueryBudgetExceeded):
+            with assert_max_queries(1):
+                Sector.query.count()
+                Business.query.count()
+
+
+def test_repeated_statements_are_reported_as_n_plus_one(caplog):
+    statements = [('SELECT * FROM user WHERE id = ?', 0.001)] * 6 + [('SELECT 1', 0.5)]
+    violation = inspect_statements(statements, 'GET index', app.logger, budget=5,
+                                   repeat_threshold=5, slow_query_ms=100)
+    assert violation == 'GET index issued 7 SQL statements (budget 5)'
+    assert 'Suspected N+1 in GET index: statement ran 6 times' in caplog.text
+    assert 'Slow query (500.0 ms) in GET index: SELECT 1' in caplog.text
+
+
+def test_admin_can_profile_a_request(client):
+    login(client, is_admin=True)
+    resp = client.get('/?_profile=1')
+    assert resp.status_code == 200
+    assert resp.headers['X-Profile-Status'] == 'recorded'
+
+    report = client.get(resp.headers['X-Profile-Report']).get_json()
+    assert report['endpoint'] == 'index'
+    assert report['sql'] and 'statement' in report['sql'][0]
+    collapsed = client.get(f"{resp.headers['X-Profile-Report']}?format=collapsed")
+    assert collapsed.mimetype == 'text/plain'
+
+    again = client.get('/', headers={'X-Profile': '1'})
+    assert again.headers['X-Profile-Status'] == 'rate-limited'
+    assert any(p['id'] == report['id'] for p in client.get('/admin/profiles').get_json())
+
+
+def test_profiling_is_ignored_for_non_admins(client):
+    login(client)
+    resp = client.get('/?_profile=1')
+    assert resp.status_code == 200
+    assert 'X-Profile-Status' not in resp.headers
+
+
+def test_rating_writes_update_histogram_and_daily_rollup(client):
+    with app.app_context():
+        business = Business(name=f'Stats {uuid.uuid4().hex[:8]}', sector_id=Sector.query.first().id)
+        db.session.add(business)
+        db.session.commit()
+        business_id = business.id
+
+    login(client)
+    client.post('/api/rate', json={'business_id': business_id, 'score': 5})
+    stats = client.get(f'/api/businesses/{business_id}/stats?days=7').get_json()
+    assert stats['distribution'] == {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1}
+    assert stats['daily'][-1]['count'] == 1
+
+    resp = client.post('/api/rate', json={'business_id': business_id, 'score': 2})
+    assert resp.get_json()['average_rating'] == 2
+    login(client)
+    client.post('/api/rate', json={'business_id': business_id, 'score': 4})
+
+    stats = client.get(f'/api/businesses/{business_id}/stats?days=7').get_json()
+    assert stats['rating_count'] == 2
+    assert stats['average_rating'] == 3
+    assert stats['distribution'] == {'1': 0, '2': 1, '3': 0, '4': 1, '5': 0}
+    assert len(stats['daily']) == 7
+    assert stats['daily'][-1] == {'date': stats['daily'][-1]['date'], 'count': 2, 'average_rating': 3}
+
+    with app.app_context():
+        before = BusinessRatingStats.query.get(business_id).get_distribution()
+    assert app.test_cli_runner().invoke(args=['backfill-rating-stats']).exit_code == 0
+    with app.app_context():
+        assert BusinessRatingStats.query.get(business_id).get_distribution() == before
+        db.session.delete(Business.query.get(business_id))
+        db.session.commit()
+
+
+def test_reads_use_replica_until_client_writes():
+    replica_dir = tempfile.mkdtemp()
+    replica_url = f"sqlite:///{os.path.join(replica_dir, 'replica.db')}"
+    replica_engine = create_engine(replica_url)
+    db.metadata.create_all(replica_engine)
+    marker = f'Replica Only {uuid.uuid4().hex[:8]}'
+    with Session(replica_engine) as replica_session:
+        replica_session.add(Sector(name=marker, description='only on the replica'))
+        replica_session.commit()
+
+    app.config['TESTING'] = True
+    configure_read_replicas([replica_url])
+    try:
+        anonymous = app.test_client()
+        assert marker.encode() in anonymous.get('/').data
+
+        writer = app.test_client()
+        login(writer)
+        with app.app_context():
+            business_id = Business.query.first().id
+        assert writer.post('/api/rate', json={'business_id': business_id, 'score': 3}).status_code == 201
+        assert marker.encode() not in writer.get('/').data
+
+        configure_read_replicas([replica_url, 'sqlite:////nonexistent-dir/replica.db'])
+        for _ in range(3):
+            assert marker.encode() in anonymous.get('/').data
+    finally:
+        configure_read_replicas([])
+        replica_engine.dispose()
+
+
+def test_bootstrap_returns_catalog_in_one_payload(client):
+    data = client.get('/api/v2/bootstrap').get_json()
+    assert data['token']
+    assert data['businesses']['columns'][:4] == ['id', 'name', 'description', 'sector_id']
+    with app.app_context():
+        assert len(data['businesses']['rows']) == Business.query.count()
+        assert len(data['sectors']['rows']) == Sector.query.count()
+
+
+def test_changes_returns_only_rows_since_token(client):
+    token = encode_sync_token(datetime.utcnow() - timedelta(seconds=1))
+    with app.app_context():
+        sector_id = Sector.query.first().id
+        business = Business(name=f'Delta {uuid.uuid4().hex[:8]}', sector_id=sector_id)
+        doomed = Business(name=f'Doomed {uuid.uuid4().hex[:8]}', sector_id=sector_id)
+        db.session.add_all([business, doomed])
+        db.session.commit()
+        business_id, doomed_id = business.id, doomed.id
+        db.session.delete(doomed)
+        db.session.commit()
+
+    login(client)
+    client.post('/api/rate', json={'business_id': business_id, 'score': 5})
+
+    data = client.get(f'/api/v2/changes?since={token}').get_json()
+    business_rows = {row[0]: row for row in data['businesses']['rows']}
+    assert business_rows[business_id][-2:] == [5, 1]
+    assert doomed_id not in business_rows
+    assert doomed_id in data['deleted']['businesses']
+    assert [row[2] for row in data['ratings']['rows'] if row[1] == business_id] == [5]
+    assert data['has_more'] is False
+
+    later = client.get(f"/api/v2/changes?since={encode_sync_token(datetime.utcnow() + timedelta(seconds=1))}").get_json()
+    assert later['ratings']['rows'] == [] and later['deleted']['businesses'] == []
+
+    assert client.get('/api/v2/changes?since=garbage').status_code == 400
+    assert client.get(f'/api/v2/changes?since={encode_sync_token(datetime(2000, 1, 1))}').status_code == 410
+
+    with app.app_context():
+        db.session.delete(Business.query.get(business_id))
+        db.session.commit()
+
+
+def test_rating_stream_receives_committed_ratings(client):
+    with app.app_context():
+        business_id = Business.query.first().id
+    app.config['SSE_HEARTBEAT_SECONDS'] = 0.05
+    resp = client.get(f'/api/stream/ratings?business_id={business_id}', buffered=False)
+    assert resp.mimetype == 'text/event-stream'
+    frames = (frame.decode('utf-8') for frame in resp.response)
+    assert next(frames).startswith('retry:')
+    assert next(frames) == ': heartbeat\n\n'
+
+    rater = app.test_client()
+    login(rater)
+    rater.post('/api/rate', json={'business_id': business_id, 'score': 5})
+    frame = next(frames)
+    assert frame.startswith('event: rating\ndata: ')
+    assert f'"business_id": {business_id}' in frame
+    resp.close()
+
+
+def test_rating_streams_leave_most_threads_free(client, monkeypatch):
+    assert app.config['SSE_MAX_SUBSCRIBERS'] == app.config['WSGI_THREADS'] // 4
+    with app.app_context():
+        business_id = Business.query.first().id
+    monkeypatch.setitem(app.config, 'SSE_MAX_SUBSCRIBERS', 1)
+    first = client.get(f'/api/stream/ratings?business_id={business_id}', buffered=False)
+    assert first.status_code == 200
+    assert next(iter(first.response)).startswith(b'retry:')
+
+    second = app.test_client().get(f'/api/stream/ratings?business_id={business_id}')
+    assert second.status_code == 503
+    assert app.test_client().get('/healthz').status_code == 200
+
+    first.close()
+    third = app.test_client().get(f'/api/stream/ratings?business_id={business_id}', buffered=False)
+    assert third.status_code == 200
+    third.close()
+
+
+def test_connection_pool_has_a_connection_per_thread():
+    with app.app_context():
+        assert db.engine.pool.size() == app.config['WSGI_THREADS']
+
+
+def test_head_requests_do_not_hold_rating_stream_slots(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'SSE_MAX_SUBSCRIBERS', 2)
+    for _ in range(5):
+        resp = client.head('/api/stream/ratings')
+        assert resp.status_code == 200
+        resp.close()
+    assert app_module.rating_hub.subscriber_count == 0
+    resp = client.get('/api/stream/ratings', buffered=False)
+    assert resp.status_code == 200
+    resp.close()
+
+
+def test_async_rating_stream_runs_on_the_event_loop(monkeypatch):
+    for module in ('a2wsgi', 'aiosqlite', 'greenlet'):
+        pytest.importorskip(module)
+    import asyncio
+    from asgi import AsyncReadAPI, create_read_engine
+
+    # Far more streams than Flask threads, none of them holding one.
+    monkeypatch.setitem(app.config, 'SSE_MAX_SUBSCRIBERS', 0)
+    monkeypatch.setitem(app.config, 'SSE_HEARTBEAT_SECONDS', 5)
+    streams = 20
+
+    async def open_stream(api, business_id, frames, left, method='GET'):
+        async def receive():
+            await left.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            frames.append(message)
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': '/api/stream/ratings', 'raw_path': b'/api/stream/ratings',
+            'query_string': f'business_id={business_id}'.encode(), 'root_path': '',
+            'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 1234), 'server': ('localhost', 80),
+        }
+        await api(scope, receive, send)
+
+    async def run():
+        engine = create_read_engine()
+        api = AsyncReadAPI(app, engine, threads=2)
+        left = asyncio.Event()
+        outputs = [[] for _ in range(streams)]
+        tasks = [asyncio.ensure_future(open_stream(api, 7, frames, left)) for frames in outputs]
+        try:
+            while app_module.rating_hub.subscriber_count < streams:
+                await asyncio.sleep(0.01)
+            # Published from another thread, as a Flask view or the IPC listener would.
+            await asyncio.to_thread(app_module.rating_hub.publish, {'business_id': 7, 'average': 4.5, 'count': 2})
+            while not all(len(frames) >= 3 for frames in outputs):
+                await asyncio.sleep(0.01)
+            left.set()
+            await asyncio.wait_for(asyncio.gather(*tasks), 2)
+            # HEAD never starts the stream, but must still give its slot back.
+            for _ in range(3):
+                await open_stream(api, 7, [], left, method='HEAD')
+        finally:
+            await engine.dispose()
+        return outputs
+
+    outputs = asyncio.run(run())
+    assert app_module.rating_hub.subscriber_count == 0
+    for frames in outputs:
+        assert frames[0]['status'] == 200
+        assert (b'content-type', b'text/event-stream; charset=utf-8') in frames[0]['headers']
+        assert frames[1]['body'] == b'retry: 3000\n\n'
+        assert frames[2]['body'] == b'event: rating\ndata: {"business_id": 7, "average": 4.5, "count": 2}\n\n'
+
+
+def test_rating_hub_coalesces_and_crosses_processes():
+    ipc_dir = tempfile.mkdtemp()
+    publisher = RatingEventHub(ipc_dir, name='publisher')
+    listener = RatingEventHub(ipc_dir, name='listener')
+    subscription = listener.subscribe()
+    publisher.publish({'business_id': 1, 'average': 4.0, 'count': 1})
+    assert subscription.next_events(timeout=2) == [{'business_id': 1, 'average': 4.0, 'count': 1}]
+
+    local = publisher.subscribe(business_id=2)
+    publisher.publish({'business_id': 2, 'average': 3.0, 'count': 1})
+    publisher.publish({'business_id': 2, 'average': 3.5, 'count': 2})
+    publisher.publish({'business_id': 3, 'average': 1.0, 'count': 1})
+    assert local.next_events(timeout=0) == [{'business_id': 2, 'average': 3.5, 'count': 2}]
+
+
+def test_login_is_rate_limited_per_ip_and_user(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setitem(app.config, 'RATE_LIMITS', dict(app.config['RATE_LIMITS'], login_ip='3/60', login_user='2/60'))
+    monkeypatch.setattr(app_module.rate_limiter, 'store', MemoryBucketStore())
+
+    username, _ = create_user()
+    for _ in range(2):
+        assert client.post('/login', json={'username': username, 'password': 'wrong'}).status_code == 401
+    blocked = client.post('/login', json={'username': username, 'password': 'wrong'})
+    assert blocked.status_code == 429
+    assert 1 <= int(blocked.headers['Retry-After']) <= 30
+
+    other, password = create_user()
+    resp = client.post('/login', json={'username': other, 'password': password})
+    assert resp.status_code == 429
+    assert client.get('/login').status_code == 200
+
+
+def test_locked_bucket_file_lets_requests_through(client, monkeypatch):
+    path = os.path.join(tempfile.mkdtemp(), 'buckets.sqlite3')
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(app_module.rate_limiter, 'store', SQLiteBucketStore(path, timeout=0.01))
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        username, _ = create_user()
+        assert client.post('/login', json={'username': username, 'password': 'wrong'}).status_code == 401
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
+
+
+def test_sqlite_buckets_are_shared_between_stores():
+    path = os.path.join(tempfile.mkdtemp(), 'buckets.sqlite3')
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    assert first.consume('k', 2, 10, now=100) == 0
+    assert second.consume('k', 2, 10, now=100) == 0
+    assert first.consume('k', 2, 10, now=100) == 5
+    assert second.consume('k', 2, 10, now=105) == 0
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        job = client.get(f'/admin/jobs/{job_id}').get_json()
+        if job['status'] in ('succeeded', 'failed') or time.time() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def test_seed_reset_runs_as_background_job(client, monkeypatch):
+    calls = []
+
+    def fake_seed(job, reset_businesses=False):
+        calls.append(reset_businesses)
+        for done in (1, 2):
+            job.progress(done, 2, f'chunk {done}')
+        return {'businesses': 0}
+
+    monkeypatch.setitem(app_module.job_runner.handlers, 'seed_sample_data', fake_seed)
+    login(client, is_admin=True)
+    resp = client.post('/admin/seed', json={'force_reset': True})
+    assert resp.status_code == 202
+    job_id = resp.get_json()['job']['id']
+    assert resp.headers['Location'].endswith(f'/admin/jobs/{job_id}')
+
+    job = wait_for_job(client, job_id)
+    assert job['status'] == 'succeeded'
+    assert (job['progress'], job['total'], job['result']) == (2, 2, {'businesses': 0})
+    assert calls == [True]
+
+
+def test_failed_job_records_error(client, monkeypatch):
+    def broken(job):
+        job.progress(1, 3)
+        raise RuntimeError('disk full')
+
+    monkeypatch.setitem(app_module.job_runner.handlers, 'broken', broken)
+    login(client, is_admin=True)
+    resp = client.post('/admin/jobs', json={'kind': 'broken'})
+    assert resp.status_code == 202
+    assert client.post('/admin/jobs', json={'kind': 'unknown'}).status_code == 400
+
+    job = wait_for_job(client, resp.get_json()['id'])
+    assert (job['status'], job['error'], job['progress']) == ('failed', 'disk full', 1)
+
+
+def test_long_jobs_keep_their_heartbeat_and_report_progress(client, monkeypatch):
+    runner = app_module.job_runner
+    monkeypatch.setattr(runner, 'stale_after', 0.5)
+    monkeypatch.setattr(runner, 'heartbeat_interval', 0.1)
+    started = threading.Event()
+
+    def silent(job):
+        started.set()
+        time.sleep(1.5)
+        return {'ok': True}
+
+    monkeypatch.setitem(runner.handlers, 'silent', silent)
+    login(client, is_admin=True)
+    job_id = client.post('/admin/jobs', json={'kind': 'silent'}).get_json()['id']
+    assert started.wait(10)
+    deadline = time.time() + 1.0
+    while time.time() < deadline:
+        # Without heartbeats the job would look stale here and be queued again.
+        with app.app_context():
+            assert runner._claim() is None
+        time.sleep(0.1)
+    assert wait_for_job(client, job_id)['status'] == 'succeeded'
+    with app.app_context():
+        assert db.session.get(app_module.Job, job_id).attempts == 1
+        businesses = Business.query.count()
+
+    job_id = client.post('/admin/jobs', json={'kind': 'rebuild_rating_stats'}).get_json()['id']
+    job = wait_for_job(client, job_id)
+    assert (job['status'], job['progress'], job['total']) == ('succeeded', businesses, businesses)
+    assert job['result']['businesses'] == businesses
+
+
+def test_idle_job_polls_only_read():
+    with app.app_context(), capture_queries() as captured:
+        assert app_module.job_runner._claim() is None
+    assert not [sql for sql in captured if sql.lstrip().upper().startswith(('UPDATE', 'INSERT', 'DELETE'))]
+
+
+def test_deletes_cascade_in_the_database(client):
+    with app.app_context():
+        user_id = User.query.filter_by(username=create_user()[0]).first().id
+        sector = Sector(name=f'Cascade {uuid.uuid4().hex[:8]}')
+        businesses = [Business(name=f'Cascade {uuid.uuid4().hex[:8]}', sector=sector) for _ in range(3)]
+        db.session.add_all(businesses)
+        db.session.flush()
+        db.session.add_all(Rating(score=4, user_id=user_id, business_id=b.id) for b in businesses for _ in range(5))
+        db.session.commit()
+        sector_id = sector.id
+        first, second, third = (b.id for b in businesses)
+
+    login(client, is_admin=True)
+    with capture_queries() as captured:
+        resp = client.delete('/admin/businesses', json={'ids': [first, second, 987654321]})
+    assert resp.get_json() == {'deleted': [first, second], 'not_found': [987654321]}
+    assert not any('FROM rating' in sql for sql in captured)
+    assert client.delete('/admin/businesses', json={'ids': 'all'}).status_code == 400
+
+    assert client.delete(f'/admin/sectors/{sector_id}').status_code == 200
+    assert client.delete(f'/admin/sectors/{sector_id}').status_code == 404
+    with app.app_context():
+        ids = [first, second, third]
+        assert Business.query.filter(Business.id.in_(ids)).count() == 0
+        assert Rating.query.filter(Rating.business_id.in_(ids)).count() == 0
+        assert BusinessRatingStats.query.filter(BusinessRatingStats.business_id.in_(ids)).count() == 0
+        tombstones = {
+            (record.entity, record.entity_id)
+            for record in DeletedRecord.query.filter(DeletedRecord.entity_id.in_(ids + [sector_id]))
+        }
+        assert {('business', first), ('business', second), ('sector', sector_id)} <= tombstones
+
+
+def test_concurrent_schema_upgrades_run_once(tmp_path):
+    database = tmp_path / 'old.db'
+    engine = create_engine(f'sqlite:///{database}')
+    with engine.begin() as connection:
+        # The schema as it was before updated_at columns and ON DELETE rules.
+        for table in db.metadata.sorted_tables:
+            ddl = str(CreateTable(table).compile(dialect=engine.dialect))
+            if table.name in ('sector', 'business', 'rating'):
+                ddl = ddl.replace('\n\tupdated_at DATETIME, ', '')
+            connection.exec_driver_sql(ddl.replace(' ON DELETE CASCADE', '').replace(' ON DELETE SET NULL', ''))
+        connection.exec_driver_sql("INSERT INTO user (id, username, email, password_hash) VALUES (1, 'u', 'u@x', 'x')")
+        for i in range(1, 14):
+            connection.exec_driver_sql(f"INSERT INTO sector (id, name) VALUES ({i}, 'Sector {i}')")
+            connection.exec_driver_sql(f"INSERT INTO business (id, name, sector_id) VALUES ({i}, 'Business {i}', {i})")
+            connection.exec_driver_sql(f"INSERT INTO rating (score, user_id, business_id, created_at) VALUES (4, 1, {i}, '2024-01-01')")
+    assert inspect(engine).get_foreign_keys('rating')[0]['options'].get('ondelete') is None
+    assert 'updated_at' not in {column['name'] for column in inspect(engine).get_columns('rating')}
+
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}')
+    command = [sys.executable, '-m', 'flask', '--app', 'app', 'upgrade-db']
+    upgrades = [
+        subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                         stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        for _ in range(4)
+    ]
+    for upgrade in upgrades:
+        output = upgrade.communicate(timeout=120)[0]
+        assert upgrade.returncode == 0, output
+
+    inspector = inspect(engine)
+    assert {fk['options'].get('ondelete') for fk in inspector.get_foreign_keys('rating')} == {'CASCADE'}
+    assert not any(name.startswith('_new_') for name in inspector.get_table_names())
+    for table_name in ('sector', 'business', 'rating'):
+        assert 'updated_at' in {column['name'] for column in inspector.get_columns(table_name)}
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('SELECT COUNT(*) FROM rating').scalar() == 13
+        assert connection.exec_driver_sql('PRAGMA foreign_key_check').fetchall() == []
+    engine.dispose()
+
+
+def test_businesses_filter_by_sectors_and_location_with_cached_facets(client):
+    tag = uuid.uuid4().hex[:8]
+    with app.app_context():
+        first, second = Sector(name=f'Facet A {tag}'), Sector(name=f'Facet B {tag}')
+        db.session.add_all([
+            Business(name=f'Facet 1 {tag}', sector=first, location='  Paris '),
+            Business(name=f'Facet 2 {tag}', sector=first, location='paris'),
+            Business(name=f'Facet 3 {tag}', sector=second, location='Dakar'),
+            Business(name=f'Facet 4 {tag}', sector=second, location=None),
+        ])
+        db.session.commit()
+        first_id, second_id = first.id, second.id
+    both = f'sector_id={first_id}&sector_id={second_id}'
+
+    businesses = client.get(f'/api/businesses?{both}&location=PARIS').get_json()
+    assert sorted(b['name'] for b in businesses) == [f'Facet 1 {tag}', f'Facet 2 {tag}']
+
+    facets = client.get(f'/api/facets?{both}').get_json()
+    assert {f['value']: (f['label'], f['count']) for f in facets['locations']} == {
+        'paris': ('Paris', 2), 'dakar': ('Dakar', 1),
+    }
+    assert facets['total'] == 4
+    by_location = client.get('/api/facets?location=paris').get_json()
+    sector_counts = {s['id']: s['count'] for s in by_location['sectors']}
+    assert (sector_counts[first_id], sector_counts[second_id]) == (2, 0)
+    assert len(app_module.facet_cache) >= 2
+
+    login(client, is_admin=True)
+    client.post('/admin/businesses', json={'name': f'Facet 5 {tag}', 'sector_id': first_id, 'location': 'DAKAR'})
+    assert len(app_module.facet_cache) == 0
+    facets = client.get(f'/api/facets?{both}').get_json()
+    assert {f['value']: f['count'] for f in facets['locations']}['dakar'] == 2
+
+    for sector_id in (first_id, second_id):
+        assert client.delete(f'/admin/sectors/{sector_id}').status_code == 200
+
+
+def test_sector_page_renders_first_page_and_loads_more_fragments(client):
+    tag = uuid.uuid4().hex[:8]
+    with app.app_context():
+        sector = Sector(name=f'Paged {tag}')
+        db.session.add_all(Business(name=f'Paged {tag} {i:02d}', sector=sector) for i in range(30))
+        db.session.commit()
+        sector_id = sector.id
+
+    page = client.get(f'/sector/{sector_id}').get_data(as_text=True)
+    assert page.count('class="card"') == app_module.CARDS_PAGE_SIZE
+    assert f'Paged {tag} 23' in page and f'Paged {tag} 24' not in page
+    cursor = page.split('data-cursor="')[1].split('"')[0]
+
+    fragment = client.get(f'/fragments/businesses?sector_id={sector_id}&after={cursor}')
+    html = fragment.get_data(as_text=True)
+    assert html.count('class="card"') == 6 and f'Paged {tag} 24' in html
+    assert 'X-Next-Cursor' not in fragment.headers
+    assert client.get('/fragments/businesses?after=not-a-cursor').status_code == 400
+    huge_id = base64.urlsafe_b64encode(json.dumps(['a', 10**30]).encode()).decode()
+    assert client.get(f'/fragments/businesses?after={huge_id}').status_code == 400
+    assert client.get(f'/?after={huge_id}').status_code == 200
+
+    login(client)
+    with app.app_context():
+        last_id = Business.query.filter_by(name=f'Paged {tag} 29').first().id
+    client.post('/api/rate', json={'business_id': last_id, 'score': 5})
+    html = client.get(f'/fragments/businesses?sector_id={sector_id}&after={cursor}').get_data(as_text=True)
+    assert '⭐ 5.0 / 5 (1 Ratings)' in html
+
+    with app.app_context():
+        app_module.delete_sector(sector_id)
+        db.session.commit()
+
+
+def test_concurrent_ratings_are_not_lost_on_sqlite(monkeypatch):
+    # Retried attempts add to the request's statement count; the budget is covered elsewhere.
+    monkeypatch.setitem(app.config, 'TESTING', False)
+    # A 1 ms busy timeout makes lock waits give up at once, so only the retry keeps writes from failing.
+    monkeypatch.setitem(app.config, 'SQLITE_PRAGMAS', {**app.config['SQLITE_PRAGMAS'], 'busy_timeout': 1})
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            pytest.skip('SQLite-specific locking behaviour')
+        db.engine.dispose()
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        sector = Sector(name=f'Contended {uuid.uuid4().hex[:8]}')
+        business = Business(name=sector.name, sector=sector)
+        db.session.add(business)
+        db.session.commit()
+        business_id, sector_id = business.id, sector.id
+
+    clients = []
+    for _ in range(12):
+        rater = app.test_client()
+        login(rater)
+        clients.append(rater)
+
+    barrier = threading.Barrier(len(clients))
+    statuses = []
+
+    def rate(rater, score):
+        barrier.wait()
+        statuses.append(rater.post('/api/rate', json={'business_id': business_id, 'score': score}).status_code)
+
+    threads = [threading.Thread(target=rate, args=(rater, i % 5 + 1)) for i, rater in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [201] * len(clients)
+    with app.app_context():
+        stats = db.session.get(BusinessRatingStats, business_id)
+        assert Rating.query.filter_by(business_id=business_id).count() == len(clients)
+        assert stats.rating_count == len(clients)
+        assert stats.score_sum == sum(i % 5 + 1 for i in range(len(clients)))
+        app_module.delete_sector(sector_id)
+        db.session.commit()
+        db.engine.dispose()
+
+
+def test_async_read_api_matches_flask_responses(client):
+    for module in ('a2wsgi', 'aiosqlite', 'greenlet'):
+        pytest.importorskip(module)
+    import asyncio
+    from asgi import AsyncReadAPI, create_read_engine
+
+    async def call(api, path, query=b''):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query, 'root_path': '',
+            'headers': [(b'host', b'localhost')], 'client': ('127.0.0.1', 1234), 'server': ('localhost', 80),
+        }
+        await api(scope, receive, send)
+        return messages[0]['status'], b''.join(m.get('body', b'') for m in messages[1:])
+
+    with app.app_context():
+        sector = Sector(name=f'Async {uuid.uuid4().hex[:8]}')
+        business = Business(name=sector.name, sector=sector, location='Lyon')
+        db.session.add(business)
+        db.session.commit()
+        business_id, sector_id = business.id, sector.id
+    login(client)
+    client.post('/api/rate', json={'business_id': business_id, 'score': 4, 'comment': 'async'})
+
+    requests = [
+        ('/api/businesses', f'sector_id={sector_id}&location=+LYON'),
+        (f'/api/ratings/business/{business_id}', ''),
+        (f'/api/businesses/{business_id}/stats', 'days=7'),
+        ('/api/businesses/999999999/stats', ''),
+    ]
+    expected = [(resp.status_code, resp.data) for resp in (client.get(f'{path}?{query}') for path, query in requests)]
+    assert b'"comment":"async"' in expected[1][1]
+
+    async def serve_all():
+        engine = create_read_engine()
+        api = AsyncReadAPI(app, engine)
+        try:
+            responses = [await call(api, path, query.encode()) for path, query in requests]
+            # Anything else is served by the Flask app.
+            responses.append(await call(api, '/route-that-does-not-exist'))
+            return responses
+        finally:
+            await engine.dispose()
+
+    responses = asyncio.run(serve_all())
+    assert responses[:-1] == expected
+    assert responses[-1][0] == 404
+    with app.app_context():
+        app_module.delete_sector(sector_id)
+        db.session.commit()
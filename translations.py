@@ -16,6 +16,7 @@ TRANSLATIONS = {
         'hotels': 'Hotels & Hospitality',
         'all_sectors': 'All Sectors',
         'view_businesses': 'View Businesses',
+        'load_more': 'Load more',
         'no_sectors': 'No sectors available yet.',
         'sector': 'Sector',
         'back_to_sectors': '← Back to Sectors',
@@ -31,6 +32,8 @@ TRANSLATIONS = {
         'location': 'Location:',
         'website': 'Website:',
         'rating_submitted': 'Rating submitted successfully!',
+        'live_updates_start': 'Show live updates',
+        'live_updates_stop': 'Stop live updates',
         'username': 'Username:',
         'email': 'Email:',
         'password': 'Password:',
@@ -65,6 +68,7 @@ TRANSLATIONS = {
         'hotels': 'Hôtels et Hôtellerie',
         'all_sectors': 'Tous les Secteurs',
         'view_businesses': 'Voir les Entreprises',
+        'load_more': 'Charger plus',
         'no_sectors': 'Aucun secteur disponible pour le moment.',
         'sector': 'Secteur',
         'back_to_sectors': '← Retour aux Secteurs',
@@ -80,6 +84,8 @@ TRANSLATIONS = {
         'location': 'Localisation:',
         'website': 'Site Web:',
         'rating_submitted': 'Évaluation soumise avec succès!',
+        'live_updates_start': 'Afficher les mises à jour en direct',
+        'live_updates_stop': 'Arrêter les mises à jour en direct',
         'username': 'Nom d\'utilisateur:',
         'email': 'Email:',
         'password': 'Mot de passe:',